@@ -1,5 +1,6 @@
 import pandas as pd
 from qalita_core.pack import Pack
+from columnar_loader import load_parquet, numeric_columns
 from qalita_core.utils import determine_recommendation_level
 
 # --- Chargement des données ---
@@ -17,23 +18,15 @@ with Pack() as pack:
     raw_df_source = pack.df_source
     configured = pack.source_config.get("config", {}).get("table_or_query")
 
-    def _load_parquet_if_path(obj):
-        try:
-            if isinstance(obj, str) and obj.lower().endswith((".parquet", ".pq")):
-                return pd.read_parquet(obj, engine="pyarrow")
-        except Exception:
-            pass
-        return obj
-
     if isinstance(raw_df_source, list):
-        loaded = [_load_parquet_if_path(x) for x in raw_df_source]
+        loaded = [load_parquet(x, columns=numeric_columns) for x in raw_df_source]
         if isinstance(configured, (list, tuple)) and len(configured) == len(loaded):
             items = list(zip(list(configured), loaded))
         else:
             base = pack.source_config["name"]
             items = [(f"{base}_{i+1}", df) for i, df in enumerate(loaded)]
     else:
-        items = [(pack.source_config["name"], _load_parquet_if_path(raw_df_source))]
+        items = [(pack.source_config["name"], load_parquet(raw_df_source, columns=numeric_columns))]
 
     for dataset_label, df_curr in items:
         float_columns = df_curr.select_dtypes(include=["float", "float64"]).columns
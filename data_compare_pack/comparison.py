@@ -0,0 +1,321 @@
+"""
+Comparison of one source / target pairing, run in the pack process or in worker processes.
+
+``compare_pairing`` loads the two datasets of a pairing (a table, a file or
+one chunk of a folder source), compares them with the configured engine,
+writes the per-pairing reports and returns the pairing's metrics. Pairings
+are independent, so they are dispatched to a pool of worker processes and
+only the pairings being compared are ever loaded.
+
+Everything a worker needs lives at module level: the pack's main.py runs at
+import time and must never be imported by a worker.
+"""
+
+import logging
+import os
+from datetime import datetime
+
+import datacompy
+import pyarrow.parquet as pq
+
+from columnar_loader import (
+    count_parquet_rows,
+    is_parquet_path,
+    load_parquet_with_sampling,
+    parquet_paths,
+    parquet_schema,
+    resolve_columns,
+)
+from comparison_stats import ComparisonStats
+from fingerprint_compare import FINGERPRINT_BUCKETS, compare_fingerprints
+from polars_compare import POLARS_AVAILABLE, compare_polars
+from pushdown_compare import PUSHDOWN_RANGES, compare_pushdown
+from table_payload import table_payload
+
+logger = logging.getLogger(__name__)
+
+# Big data configuration
+MAX_ROWS_FOR_FULL_COMPARE = 1_000_000  # Sample if more than 1M rows
+SAMPLE_SIZE_FOR_LARGE_DATASETS = 500_000  # Sample size for large datasets
+MAX_MISMATCHES_TO_EXPORT = 10_000  # Limit mismatch export to avoid memory issues
+COMPARE_ENGINES = ("auto", "polars", "fingerprint", "datacompy")
+
+
+def compare_options(job_config, sampling, report_dir=None, pushdown_configs=None):
+    """
+    Settings of ``compare_pairing`` read from the pack's ``job`` configuration (a picklable dict).
+
+    ``pushdown_configs`` holds the (source, target) database configurations
+    when the pairings are compared inside the databases.
+    """
+    compare_engine = job_config.get("compare_engine", "auto")
+    if compare_engine not in COMPARE_ENGINES:
+        raise ValueError(f"Unknown compare_engine '{compare_engine}', expected one of {COMPARE_ENGINES}")
+    if compare_engine in ("polars", "fingerprint") and not POLARS_AVAILABLE:
+        logger.warning("Polars is not installed, comparing with datacompy")
+        compare_engine = "datacompy"
+    memory_budget_mb = job_config.get("pair_memory_budget_mb")
+    return {
+        "compare_col_list": job_config.get("compare_col_list", []),
+        "id_columns": job_config.get("id_columns", []),
+        "abs_tol": job_config.get("abs_tol", 0.0001),
+        "rel_tol": job_config.get("rel_tol", 0),
+        "compare_engine": compare_engine,
+        "text_report": job_config.get("text_report", False),
+        "fingerprint_buckets": job_config.get("fingerprint_buckets", FINGERPRINT_BUCKETS),
+        "memory_budget": memory_budget_mb * 1024 ** 2 if memory_budget_mb else None,
+        "sampling": sampling,
+        "report_dir": report_dir,  # Excel reports are only written for file sources
+        "pushdown": pushdown_configs,
+        "pushdown_ranges": job_config.get("pushdown_ranges", PUSHDOWN_RANGES),
+    }
+
+
+def _load_columns(options):
+    # Only the compared and join columns are read when the column list is explicit
+    compare_col_list = options["compare_col_list"]
+    return list(dict.fromkeys(compare_col_list + options["id_columns"])) if compare_col_list else None
+
+
+def load_dataset(obj, options):
+    """Load parquet with automatic sampling for large datasets (other sources are returned as is)."""
+    try:
+        if is_parquet_path(obj) or isinstance(obj, list):
+            df, is_sampled, orig_rows, sampling_info = load_parquet_with_sampling(
+                obj if isinstance(obj, list) else [obj],
+                MAX_ROWS_FOR_FULL_COMPARE,
+                SAMPLE_SIZE_FOR_LARGE_DATASETS,
+                sampling=options["sampling"],
+                columns=_load_columns(options),
+            )
+            if is_sampled:
+                print(f"  Sampled from {orig_rows:,} rows ({sampling_info.get('strategy', 'head')})")
+            return df
+    except Exception:
+        pass
+    return obj
+
+
+def row_count(obj):
+    """Rows of a dataset left as parquet path(s) or already loaded as a DataFrame."""
+    paths = parquet_paths(obj)
+    if paths:
+        return count_parquet_rows(paths)
+    return len(obj) if hasattr(obj, "__len__") else 0
+
+
+def estimated_bytes(obj, columns=None):
+    """
+    Memory taken by a dataset once loaded: the uncompressed size of its
+    parquet column chunks, or the size of an already loaded DataFrame.
+    """
+    paths = parquet_paths(obj)
+    if not paths:
+        return int(obj.memory_usage(index=False).sum()) if hasattr(obj, "memory_usage") else 0
+    wanted = resolve_columns(paths, columns)
+    wanted = set(wanted) if wanted is not None else None
+    total = 0
+    for path in paths:
+        metadata = pq.ParquetFile(path).metadata
+        for i in range(metadata.num_row_groups):
+            row_group = metadata.row_group(i)
+            for j in range(row_group.num_columns):
+                chunk = row_group.column(j)
+                if wanted is None or chunk.path_in_schema in wanted:
+                    total += chunk.total_uncompressed_size
+    return total
+
+
+def dataset_columns(obj):
+    """Columns of a dataset, read from the parquet footer when it is not loaded."""
+    schema = parquet_schema(obj)
+    return list(schema.names) if schema is not None else list(obj.columns)
+
+
+def _select_engine(s_obj, t_obj, options):
+    """
+    Engine of a pairing: with ``auto``, the polars engine compares every row
+    of the pairings datacompy would sample or that exceed the memory budget.
+    """
+    engine = options["compare_engine"]
+    if engine != "auto":
+        return engine
+    if not POLARS_AVAILABLE:
+        return "datacompy"
+    if max(row_count(s_obj), row_count(t_obj)) > MAX_ROWS_FOR_FULL_COMPARE:
+        return "polars"
+    budget = options["memory_budget"]
+    if budget is not None:
+        columns = _load_columns(options)
+        if estimated_bytes(s_obj, columns) + estimated_bytes(t_obj, columns) > budget:
+            return "polars"
+    return "datacompy"
+
+
+def compare_pairing(s_label, s_obj, t_label, t_obj, options):
+    """
+    Compare one pairing.
+
+    Returns:
+        list: metrics of the pairing (scoped on the source dataset label).
+    """
+    compare_col_list = options["compare_col_list"]
+    id_columns = options["id_columns"]
+    abs_tol = options["abs_tol"]
+    rel_tol = options["rel_tol"]
+
+    if options["pushdown"] is not None:
+        ############################ Comparison inside the databases (checksums per key range)
+        print(f"[{s_label} vs {t_label}] Comparing inside the databases")
+        source_config, target_config = options["pushdown"]
+        stats, df_all_mismatch = compare_pushdown(
+            source_config, target_config, s_obj, t_obj, id_columns, compare_col_list, abs_tol, rel_tol,
+            limit=MAX_MISMATCHES_TO_EXPORT, source_label=s_label, target_label=t_label,
+            ranges=options["pushdown_ranges"],
+        )
+        comparison_report = stats.report() if options["text_report"] else None
+        return _pairing_metrics(s_label, t_label, stats, df_all_mismatch, comparison_report, options)
+
+    s_columns = dataset_columns(s_obj)
+    t_columns = dataset_columns(t_obj)
+    use_cols = compare_col_list or [col for col in s_columns if col in t_columns]
+    missing_in_source = [col for col in use_cols if col not in s_columns]
+    missing_in_target = [col for col in use_cols if col not in t_columns]
+    if missing_in_source:
+        raise ValueError(f"Columns missing in source {s_label}: {missing_in_source}")
+    if missing_in_target:
+        raise ValueError(f"Columns missing in target {t_label}: {missing_in_target}")
+
+    combined_columns_list = list(dict.fromkeys(use_cols + id_columns))
+    if len(id_columns) == 0:
+        id_columns = use_cols
+
+    engine = _select_engine(s_obj, t_obj, options)
+    if engine in ("polars", "fingerprint"):
+        ############################ Comparison using Polars joins (every row)
+        print(f"[{s_label} vs {t_label}] Comparing with the {engine} engine")
+        if engine == "fingerprint":
+            # Row-level joins only in the key buckets whose checksums differ
+            stats, df_all_mismatch = compare_fingerprints(
+                s_obj, t_obj, id_columns, combined_columns_list, abs_tol, rel_tol,
+                limit=MAX_MISMATCHES_TO_EXPORT, source_label=s_label, target_label=t_label,
+                buckets=options["fingerprint_buckets"],
+            )
+        else:
+            stats, df_all_mismatch = compare_polars(
+                s_obj, t_obj, id_columns, combined_columns_list, abs_tol, rel_tol,
+                limit=MAX_MISMATCHES_TO_EXPORT, source_label=s_label, target_label=t_label,
+            )
+        comparison_report = stats.report() if options["text_report"] else None
+    else:
+        s_df = load_dataset(s_obj, options)
+        t_df = load_dataset(t_obj, options)
+
+        # Take explicit copies to avoid pandas SettingWithCopyWarning from downstream mutations
+        df_source_subset = s_df.loc[:, combined_columns_list].copy()
+        df_target_subset = t_df.loc[:, combined_columns_list].copy()
+
+        ############################ Comparison using datacompy
+        compare = datacompy.Compare(
+            df_source_subset,
+            df_target_subset,
+            join_columns=id_columns,
+            abs_tol=abs_tol,
+            rel_tol=rel_tol,
+            df1_name=s_label,
+            df2_name=t_label,
+            cast_column_names_lower=False,
+        )
+        stats = ComparisonStats.from_datacompy(compare)
+        df_all_mismatch = compare.all_mismatch(ignore_matching_cols=True)
+        # Same labels as the other engines: <column>_source / <column>_target
+        value_labels = {}
+        for col in use_cols:
+            value_labels[f"{col}_{s_label}"] = f"{col}_source"
+            value_labels[f"{col}_{t_label}"] = f"{col}_target"
+        df_all_mismatch = df_all_mismatch.rename(columns=value_labels)
+        comparison_report = compare.report(sample_count=10, column_count=10) if options["text_report"] else None
+
+    return _pairing_metrics(s_label, t_label, stats, df_all_mismatch, comparison_report, options)
+
+
+def _pairing_metrics(s_label, t_label, stats, df_all_mismatch, comparison_report, options):
+    """Metrics and reports of a compared pairing."""
+    # Exporting comparison metrics
+    metrics = stats.metrics()
+    if comparison_report is not None:
+        with open(f"comparison_report_{s_label}_vs_{t_label}.txt", "w") as f:
+            f.write(comparison_report)
+
+    ############################ Computing the matching score
+    total_source_rows = stats.source_rows
+    total_target_rows = stats.target_rows
+    num_rows_in_common = stats.rows_in_common
+    num_mismatches = stats.mismatched_rows
+
+    print(f"[{s_label} vs {t_label}] Total rows in target: {total_target_rows}")
+    if total_target_rows == 0:
+        print("Cannot compute the score as the total number of rows in target is zero.")
+    else:
+        if num_mismatches == 0:
+            score = 1.0
+        else:
+            score = max(0, 1 - (num_mismatches / total_target_rows))
+        print(f"Matching score: {score}")
+        metrics.append(
+            {"key": "score", "value": str(round(score, 2)), "scope": {"perimeter": "dataset", "value": s_label}}
+        )
+
+    if total_target_rows == 0:
+        precision = 0
+    else:
+        precision = num_rows_in_common / total_target_rows
+
+    if total_source_rows == 0:
+        recall = 0
+    else:
+        recall = num_rows_in_common / total_source_rows
+
+    print(f"Precision: {precision}")
+    print(f"Recall: {recall}")
+
+    if precision + recall == 0:
+        f1_score = 0
+    else:
+        f1_score = 2 * (precision * recall) / (precision + recall)
+
+    print(f"F1 Score: {f1_score}")
+
+    metrics.extend(
+        [
+            {"key": "precision", "value": str(round(precision, 2)), "scope": {"perimeter": "dataset", "value": s_label}},
+            {"key": "recall", "value": str(round(recall, 2)), "scope": {"perimeter": "dataset", "value": s_label}},
+            {"key": "f1_score", "value": str(round(f1_score, 2)), "scope": {"perimeter": "dataset", "value": s_label}},
+        ]
+    )
+
+    # Limit mismatches to avoid memory issues with large datasets
+    if num_mismatches > MAX_MISMATCHES_TO_EXPORT:
+        print(f"Limiting mismatch export from {num_mismatches:,} to {MAX_MISMATCHES_TO_EXPORT:,} rows")
+    format_structure = table_payload(
+        df_all_mismatch, MAX_MISMATCHES_TO_EXPORT, total_rows=num_mismatches, total_key="total_mismatches"
+    )
+
+    metrics.extend(
+        [
+            {"key": "recommendation_levels_mismatches", "value": {"info": "0", "warning": "0.5", "high": "0.8"}, "scope": {"perimeter": "dataset", "value": s_label}},
+            {"key": "mismatches_table", "value": format_structure, "scope": {"perimeter": "dataset", "value": s_label}},
+        ]
+    )
+
+    ######################## Export per pairing
+    if not df_all_mismatch.empty and options["report_dir"] is not None:
+        current_date = datetime.now().strftime("%Y%m%d")
+        report_file_path = os.path.join(
+            options["report_dir"],
+            f"{current_date}_data_compare_report_{s_label}_vs_{t_label}.xlsx",
+        )
+        df_all_mismatch.to_excel(report_file_path, index=False)
+        print(f"mismatches rows have been exported to {report_file_path}")
+
+    return metrics
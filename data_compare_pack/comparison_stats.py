@@ -0,0 +1,202 @@
+"""
+Statistics of the comparison of one source / target pairing.
+
+Both engines (datacompy and polars) fill a ``ComparisonStats``, and the pack
+metrics are read from its fields: datacompy's text report is no longer
+rendered and parsed back, and is only written when ``job.text_report`` is set.
+"""
+
+import math
+
+
+def _name(label):
+    return label.lower().replace(" ", "_")
+
+
+class ComparisonStats:
+    """
+    Row and column counts of a comparison.
+
+    Args:
+        source_label, target_label: dataset labels.
+        source_rows, target_rows: rows of each side.
+        source_columns, target_columns: columns of each side.
+        columns_in_common: columns present on both sides.
+        rows_in_common: rows matched on the join columns.
+        rows_only_in_source, rows_only_in_target: rows without a match.
+        mismatched_rows: rows in common with at least one unequal value.
+        column_mismatches: {column: unequal values} of every compared column
+            (join columns included).
+        column_max_diff: {column: largest absolute difference} of the numeric
+            columns.
+        abs_tol, rel_tol: numeric tolerances used.
+    """
+
+    def __init__(
+        self,
+        source_label,
+        target_label,
+        source_rows,
+        target_rows,
+        source_columns,
+        target_columns,
+        columns_in_common,
+        rows_in_common,
+        rows_only_in_source,
+        rows_only_in_target,
+        mismatched_rows,
+        column_mismatches,
+        column_max_diff=None,
+        abs_tol=0.0001,
+        rel_tol=0,
+    ):
+        self.source_label = source_label
+        self.target_label = target_label
+        self.source_rows = source_rows
+        self.target_rows = target_rows
+        self.source_columns = source_columns
+        self.target_columns = target_columns
+        self.columns_in_common = columns_in_common
+        self.rows_in_common = rows_in_common
+        self.rows_only_in_source = rows_only_in_source
+        self.rows_only_in_target = rows_only_in_target
+        self.mismatched_rows = mismatched_rows
+        self.column_mismatches = column_mismatches
+        self.column_max_diff = column_max_diff or {}
+        self.abs_tol = abs_tol
+        self.rel_tol = rel_tol
+
+    @classmethod
+    def from_datacompy(cls, compare):
+        """Statistics of a ``datacompy.Compare`` (without rendering its report)."""
+        return cls(
+            source_label=compare.df1_name,
+            target_label=compare.df2_name,
+            source_rows=compare.df1.shape[0],
+            target_rows=compare.df2.shape[0],
+            source_columns=compare.df1.shape[1],
+            target_columns=compare.df2.shape[1],
+            columns_in_common=len(compare.intersect_columns()),
+            rows_in_common=len(compare.intersect_rows),
+            rows_only_in_source=len(compare.df1_unq_rows),
+            rows_only_in_target=len(compare.df2_unq_rows),
+            mismatched_rows=len(compare.intersect_rows) - compare.count_matching_rows(),
+            column_mismatches={s["column"]: int(s["unequal_cnt"]) for s in compare.column_stats},
+            column_max_diff={
+                s["column"]: float(s["max_diff"])
+                for s in compare.column_stats
+                if compare.df1[s["column"]].dtype.kind in "iufc" and compare.df2[s["column"]].dtype.kind in "iufc"
+            },
+            abs_tol=compare.abs_tol,
+            rel_tol=compare.rel_tol,
+        )
+
+    @classmethod
+    def empty(cls, source_label, target_label, columns, abs_tol=0.0001, rel_tol=0):
+        """Statistics of two empty datasets sharing ``columns``."""
+        return cls(
+            source_label, target_label, 0, 0, len(columns), len(columns), len(columns), 0, 0, 0, 0,
+            column_mismatches={c: 0 for c in columns}, abs_tol=abs_tol, rel_tol=rel_tol,
+        )
+
+    def add_matching_rows(self, rows):
+        """Count ``rows`` identical rows present on both sides (checked outside the comparison)."""
+        self.source_rows += rows
+        self.target_rows += rows
+        self.rows_in_common += rows
+
+    @property
+    def columns_with_mismatches(self):
+        return [column for column, count in self.column_mismatches.items() if count]
+
+    @property
+    def unequal_values(self):
+        return sum(self.column_mismatches.values())
+
+    def metrics(self):
+        """
+        Dataset metrics of the comparison, under the keys of the sections of
+        datacompy's report (``column_summary_*``, ``row_summary_*``,
+        ``column_comparison_*``), plus column metrics of the columns holding
+        unequal values.
+        """
+        source, target = _name(self.source_label), _name(self.target_label)
+        scope = {"perimeter": "dataset", "value": self.source_label}
+        metrics = []
+        for label, columns, rows in (
+            (self.source_label, self.source_columns, self.source_rows),
+            (self.target_label, self.target_columns, self.target_rows),
+        ):
+            metrics.extend(
+                [
+                    {"key": "dataframe_summary_number_columns_" + label, "value": columns, "scope": {"perimeter": "dataset", "value": label}},
+                    {"key": "dataframe_summary_number_rows_" + label, "value": rows, "scope": {"perimeter": "dataset", "value": label}},
+                ]
+            )
+        unequal_columns = len(self.columns_with_mismatches)
+        summary = {
+            "column_summary_number_of_columns_in_common": self.columns_in_common,
+            f"column_summary_number_of_columns_in_{source}_but_not_in_{target}": self.source_columns - self.columns_in_common,
+            f"column_summary_number_of_columns_in_{target}_but_not_in_{source}": self.target_columns - self.columns_in_common,
+            "row_summary_absolute_tolerance": self.abs_tol,
+            "row_summary_relative_tolerance": self.rel_tol,
+            "row_summary_number_of_rows_in_common": self.rows_in_common,
+            f"row_summary_number_of_rows_in_{source}_but_not_in_{target}": self.rows_only_in_source,
+            f"row_summary_number_of_rows_in_{target}_but_not_in_{source}": self.rows_only_in_target,
+            "column_comparison_number_of_columns_compared_with_some_values_unequal": unequal_columns,
+            "column_comparison_number_of_columns_compared_with_all_values_equal": len(self.column_mismatches) - unequal_columns,
+            "column_comparison_total_number_of_values_which_compare_unequal": self.unequal_values,
+        }
+        metrics.extend({"key": key, "value": str(value), "scope": scope} for key, value in summary.items())
+
+        for column in self.columns_with_mismatches:
+            column_scope = {"perimeter": "column", "value": column, "parent_scope": scope}
+            metrics.append({"key": "unequal_values", "value": self.column_mismatches[column], "scope": column_scope})
+            if not math.isnan(self.column_max_diff.get(column, math.nan)):
+                metrics.append({"key": "max_diff", "value": self.column_max_diff[column], "scope": column_scope})
+        return metrics
+
+    def report(self):
+        """Plain-text summary of the comparison, laid out as datacompy's report."""
+        source, target = self.source_label, self.target_label
+        lines = [
+            "Data Comparison",
+            "---------------",
+            "",
+            "Column Summary",
+            "--------------",
+            "",
+            f"Number of columns in common: {self.columns_in_common}",
+            f"Number of columns in {source} but not in {target}: {self.source_columns - self.columns_in_common}",
+            f"Number of columns in {target} but not in {source}: {self.target_columns - self.columns_in_common}",
+            "",
+            "Row Summary",
+            "-----------",
+            "",
+            f"Absolute Tolerance: {self.abs_tol}",
+            f"Relative Tolerance: {self.rel_tol}",
+            f"Number of rows in common: {self.rows_in_common}",
+            f"Number of rows in {source} but not in {target}: {self.rows_only_in_source}",
+            f"Number of rows in {target} but not in {source}: {self.rows_only_in_target}",
+            "",
+            f"Number of rows with some compared columns unequal: {self.mismatched_rows}",
+            f"Number of rows with all compared columns equal: {self.rows_in_common - self.mismatched_rows}",
+            "",
+            "Column Comparison",
+            "-----------------",
+            "",
+            f"Number of columns compared with some values unequal: {len(self.columns_with_mismatches)}",
+            f"Number of columns compared with all values equal: {len(self.column_mismatches) - len(self.columns_with_mismatches)}",
+            f"Total number of values which compare unequal: {self.unequal_values}",
+            "",
+        ]
+        if self.columns_with_mismatches:
+            lines += ["Columns with Unequal Values", "---------------------------", ""]
+            for column in self.columns_with_mismatches:
+                max_diff = self.column_max_diff.get(column, math.nan)
+                lines.append(
+                    f"{column}: {self.column_mismatches[column]} unequal"
+                    + (f", max diff {max_diff}" if not math.isnan(max_diff) else "")
+                )
+            lines.append("")
+        return "\n".join(lines)
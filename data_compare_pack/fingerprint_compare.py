@@ -0,0 +1,101 @@
+"""
+Fingerprint comparison (``compare_engine: fingerprint``).
+
+A quick "are these two tables identical" check that only does detailed work
+where differences exist:
+
+1. Every row gets two 64-bit digests: one of its ``id_columns`` and one of all
+   its compared columns. Rows are bucketed by key digest
+   (``fingerprint_buckets`` buckets), and each side is reduced in one
+   streaming pass to a checksum per bucket: its row count and the sums of the
+   high and low 32 bits of the row digests (order independent, and sensitive
+   to repeated rows unlike a XOR).
+2. Buckets whose checksums agree hold the same rows on both sides (up to a
+   collision of 64-bit digests) and are counted as matching.
+3. Only the rows of the buckets whose checksums differ are compared row by
+   row with the polars engine (joins on ``id_columns`` with the tolerances).
+
+Digests are taken on the stored values, so values equal within
+``abs_tol`` / ``rel_tol``, or stored with different types on the two sides
+(integers against floats), land in differing buckets and are then compared
+exactly: the result is the one of the polars engine, only slower when most
+buckets differ.
+"""
+
+import pandas as pd
+
+from comparison_stats import ComparisonStats
+from polars_compare import POLARS_AVAILABLE, collect, compare_polars, lazy_frame
+
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+
+FINGERPRINT_BUCKETS = 4096
+_SEED = 20240917
+_BUCKET = "_bucket"
+_ROW_DIGEST = "_row_digest"
+_LOW_BITS = 1 << 32
+
+
+def _bucket_expr(id_columns, buckets):
+    return (pl.struct(id_columns).hash(_SEED) % buckets).alias(_BUCKET)
+
+
+def bucket_checksums(lf, id_columns, columns, buckets=FINGERPRINT_BUCKETS):
+    """Row count and digest sums of every non-empty bucket of a lazy frame (one streaming pass)."""
+    digest = pl.struct(columns).hash(_SEED)
+    return collect(
+        lf.select(_bucket_expr(id_columns, buckets), digest.alias(_ROW_DIGEST))
+        .group_by(_BUCKET)
+        .agg(
+            pl.len().alias("rows"),
+            (pl.col(_ROW_DIGEST) // _LOW_BITS).sum().alias("high"),
+            (pl.col(_ROW_DIGEST) % _LOW_BITS).sum().alias("low"),
+        )
+    )
+
+
+def compare_fingerprints(
+    source, target, id_columns, compare_columns, abs_tol=0.0001, rel_tol=0, limit=None,
+    source_label="source", target_label="target", buckets=FINGERPRINT_BUCKETS,
+):
+    """
+    Compare two datasets through bucket checksums, drilling down into differing buckets.
+
+    Arguments and result are those of ``compare_polars``, plus ``buckets``:
+    the number of key-digest buckets.
+    """
+    if not POLARS_AVAILABLE:
+        raise ImportError("Polars required for the fingerprint comparison engine")
+
+    id_columns = list(id_columns)
+    columns = list(dict.fromkeys(id_columns + list(compare_columns)))
+    source_lf = lazy_frame(source, columns)
+    target_lf = lazy_frame(target, columns)
+
+    checksums = bucket_checksums(source_lf, id_columns, columns, buckets).join(
+        bucket_checksums(target_lf, id_columns, columns, buckets),
+        on=_BUCKET, how="full", coalesce=True, suffix="_target",
+    )
+    same = (
+        (pl.col("rows") == pl.col("rows_target"))
+        & (pl.col("high") == pl.col("high_target"))
+        & (pl.col("low") == pl.col("low_target"))
+    ).fill_null(False)
+    matching_rows = int(checksums.filter(same)["rows"].sum() or 0)
+    differing = checksums.filter(~same)[_BUCKET]
+    print(f"[{source_label} vs {target_label}] {len(differing):,} of {len(checksums):,} buckets differ")
+
+    if len(differing):
+        in_differing = _bucket_expr(id_columns, buckets).is_in(differing.implode())
+        stats, mismatches = compare_polars(
+            source_lf.filter(in_differing), target_lf.filter(in_differing), id_columns, columns,
+            abs_tol, rel_tol, limit=limit, source_label=source_label, target_label=target_label,
+        )
+    else:
+        stats = ComparisonStats.empty(source_label, target_label, columns, abs_tol, rel_tol)
+        mismatches = pd.DataFrame(columns=id_columns)
+    stats.add_matching_rows(matching_rows)
+    return stats, mismatches
@@ -0,0 +1,182 @@
+"""
+Comparison engine built on Polars lazy joins (``compare_engine: polars``).
+
+Source and target are scanned lazily and joined on ``id_columns``, so the
+comparison runs over every row instead of the head sample handed to
+datacompy on large inputs:
+
+- rows only in the source / target: anti-joins on the key columns;
+- rows in common and per-column mismatch counts: one aggregation over the
+  inner join. Numeric columns match when ``|source - target| <= abs_tol +
+  rel_tol * |target|`` (``numpy.isclose``, as datacompy), other columns when
+  the values are equal; two missing values always match;
+- mismatched rows: the same join filtered on rows with a mismatch, read until
+  ``limit`` rows are found.
+
+As with datacompy, missing keys match each other and rows sharing a key are
+paired in the order of the files.
+"""
+
+import pandas as pd
+
+from columnar_loader import is_parquet_path, parquet_paths, scan_parquet
+from comparison_stats import ComparisonStats
+
+try:
+    import polars as pl
+    POLARS_AVAILABLE = True
+except ImportError:
+    POLARS_AVAILABLE = False
+    pl = None
+
+_KEY_RANK = "_key_rank"
+_MISMATCHED = "_mismatched"
+
+
+def collect(lf):
+    """Collect a lazy frame with the streaming engine when the plan supports it."""
+    try:
+        return lf.collect(engine="streaming")
+    except Exception:
+        return lf.collect()
+
+
+def lazy_frame(obj, columns):
+    """Lazy Polars frame of a parquet path, a list of parquet paths, a pandas DataFrame or a lazy frame."""
+    if isinstance(obj, pl.LazyFrame):
+        return obj.select(columns)
+    if is_parquet_path(obj) or isinstance(obj, (list, tuple)):
+        return scan_parquet(parquet_paths(obj), columns)
+    return pl.from_pandas(obj.loc[:, columns]).lazy()
+
+
+def _count(lf):
+    return int(collect(lf.select(pl.len())).item())
+
+
+def _has_duplicate_keys(lf, id_columns):
+    duplicates = lf.select(id_columns).group_by(id_columns).agg(pl.len().alias("_n")).filter(pl.col("_n") > 1)
+    return not collect(duplicates.head(1)).is_empty()
+
+
+def _matches(source, target, source_dtype, target_dtype, abs_tol, rel_tol):
+    """Expression telling whether the source and target values of a column match."""
+    both_missing = source.is_null() & target.is_null()
+    if source_dtype.is_numeric() and target_dtype.is_numeric():
+        source = source.cast(pl.Float64)
+        target = target.cast(pl.Float64)
+        close = (source - target).abs() <= abs_tol + rel_tol * target.abs()
+        both_nan = source.is_nan() & target.is_nan()
+        return (close | both_nan).fill_null(False) | both_missing
+    if source_dtype != target_dtype:
+        source = source.cast(pl.String)
+        target = target.cast(pl.String)
+    return source.eq_missing(target)
+
+
+def compare_polars(
+    source, target, id_columns, compare_columns, abs_tol=0.0001, rel_tol=0, limit=None,
+    source_label="source", target_label="target",
+):
+    """
+    Compare two datasets joined on ``id_columns``.
+
+    Args:
+        source, target: parquet path, list of parquet paths or pandas DataFrame.
+        id_columns: join columns.
+        compare_columns: columns compared (join columns are compared as equal).
+        abs_tol, rel_tol: tolerances of numeric columns.
+        limit: maximum number of mismatched rows returned (all when None).
+        source_label, target_label: dataset labels of the statistics.
+
+    Returns:
+        tuple: (ComparisonStats, pandas DataFrame of the mismatched rows with
+        the join columns followed by ``<column>_source`` / ``<column>_target``
+        for every column holding unequal values)
+    """
+    if not POLARS_AVAILABLE:
+        raise ImportError("Polars required for the polars comparison engine")
+
+    id_columns = list(id_columns)
+    value_columns = [c for c in compare_columns if c not in id_columns]
+    columns = list(dict.fromkeys(id_columns + value_columns))
+    source_lf = lazy_frame(source, columns)
+    target_lf = lazy_frame(target, columns)
+    source_schema = source_lf.collect_schema()
+    target_schema = target_lf.collect_schema()
+
+    keys = id_columns
+    if _has_duplicate_keys(source_lf, id_columns) or _has_duplicate_keys(target_lf, id_columns):
+        keys = id_columns + [_KEY_RANK]
+        rank = pl.int_range(pl.len()).over(id_columns).alias(_KEY_RANK)
+        source_lf = source_lf.with_columns(rank)
+        target_lf = target_lf.with_columns(rank)
+
+    joined = source_lf.select(keys + [pl.col(c).alias(f"{c}_source") for c in value_columns]).join(
+        target_lf.select(keys + [pl.col(c).alias(f"{c}_target") for c in value_columns]),
+        on=keys,
+        how="inner",
+        nulls_equal=True,
+    )
+    unequal = {
+        c: ~_matches(
+            pl.col(f"{c}_source"), pl.col(f"{c}_target"), source_schema[c], target_schema[c], abs_tol, rel_tol
+        )
+        for c in value_columns
+    }
+    any_unequal = pl.any_horizontal(list(unequal.values())) if unequal else pl.lit(False)
+    numeric_columns = [
+        c for c in value_columns if source_schema[c].is_numeric() and target_schema[c].is_numeric()
+    ]
+    max_diff = {
+        c: (pl.col(f"{c}_source").cast(pl.Float64) - pl.col(f"{c}_target").cast(pl.Float64)).abs().max()
+        for c in numeric_columns
+    }
+
+    summary = collect(
+        joined.select(
+            [pl.len().alias("_rows_in_common"), any_unequal.sum().alias(_MISMATCHED)]
+            + [expr.sum().alias(f"{c}_unequal") for c, expr in unequal.items()]
+            + [expr.alias(f"{c}_max_diff") for c, expr in max_diff.items()]
+        )
+    ).row(0, named=True)
+    rows_in_common = int(summary["_rows_in_common"])
+    mismatched_rows = int(summary[_MISMATCHED] or 0)
+    column_mismatches = {c: 0 for c in id_columns}
+    column_mismatches.update({c: int(summary[f"{c}_unequal"] or 0) for c in value_columns})
+    column_max_diff = {
+        c: float(summary[f"{c}_max_diff"]) for c in numeric_columns if summary[f"{c}_max_diff"] is not None
+    }
+
+    key_lf = target_lf.select(keys)
+    rows_only_in_source = _count(source_lf.select(keys).join(key_lf, on=keys, how="anti", nulls_equal=True))
+    rows_only_in_target = _count(key_lf.join(source_lf.select(keys), on=keys, how="anti", nulls_equal=True))
+
+    unequal_columns = [c for c in value_columns if column_mismatches[c]]
+    mismatches = pd.DataFrame(columns=id_columns)
+    if mismatched_rows and limit != 0:
+        mismatch_lf = joined.filter(any_unequal).select(
+            id_columns + [f"{c}_{side}" for c in unequal_columns for side in ("source", "target")]
+        )
+        if limit is not None:
+            mismatch_lf = mismatch_lf.head(limit)
+        mismatches = collect(mismatch_lf).to_pandas()
+
+    stats = ComparisonStats(
+        source_label=source_label,
+        target_label=target_label,
+        source_rows=rows_in_common + rows_only_in_source,
+        target_rows=rows_in_common + rows_only_in_target,
+        source_columns=len(columns),
+        target_columns=len(columns),
+        columns_in_common=len(columns),
+        rows_in_common=rows_in_common,
+        rows_only_in_source=rows_only_in_source,
+        rows_only_in_target=rows_only_in_target,
+        mismatched_rows=mismatched_rows,
+        column_mismatches=column_mismatches,
+        column_max_diff=column_max_diff,
+        abs_tol=abs_tol,
+        rel_tol=rel_tol,
+    )
+    return stats, mismatches
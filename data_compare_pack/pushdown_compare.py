@@ -0,0 +1,265 @@
+"""
+Pushdown comparison of two SQL tables or queries (``pushdown: true``).
+
+When source and target are both SQL databases, nothing is loaded up front:
+
+1. A sample of each side (``PUSHDOWN_SAMPLE_ROWS`` rows) gives the columns and
+   tells the numeric ones.
+2. Rows are cut in ``pushdown_ranges`` ranges of the first ``id_columns``
+   key (an integer key; any other key makes a single range). Each database
+   returns one row of checksums per range, computed by a ``GROUP BY`` on its
+   side: row count, the sum of a 32-bit hash of every row, and per column the
+   non-null count, min and max, plus the sum and sum of squares of numeric
+   columns.
+3. Ranges whose checksums are identical count as matching rows. Only the
+   rows of the other ranges are fetched, and compared row by row with the
+   polars engine (values equal within ``abs_tol`` / ``rel_tol`` but not
+   identical are found there).
+
+The row hash is computed by each dialect's own function (MD5 on PostgreSQL,
+CRC32 on MySQL, BINARY_CHECKSUM on SQL Server, ORA_HASH on Oracle, a
+function registered on the connection on SQLite), so it is only comparable
+when both sides use the same dialect. Otherwise no range can be trusted and
+both sides are fetched in full.
+
+Only the checksums (a few rows per range) and the rows of differing ranges
+move over the wire.
+"""
+
+import numbers
+import zlib
+
+import pandas as pd
+import sqlalchemy as sa
+from qalita_core.data_source_opener import DatabaseSource
+
+from comparison_stats import ComparisonStats
+from polars_compare import compare_polars
+
+SQL_SOURCE_TYPES = ("database", "postgresql", "mysql", "oracle", "mssql", "sqlite")
+PUSHDOWN_RANGES = 256
+PUSHDOWN_SAMPLE_ROWS = 100
+_BUCKET = "_bucket"
+_ROWS = "_rows"
+_ROW_HASH = "_row_hash"
+_NULL_BUCKET = "null"
+_NULL_TEXT = "~"
+_SQLITE_ROW_HASH = "qalita_row_hash"
+
+
+def is_sql_source(source_config):
+    return source_config.get("type") in SQL_SOURCE_TYPES
+
+
+def sql_engine(source_config):
+    """SQLAlchemy engine of a database source configuration (as built by ``pack.load_data``)."""
+    config = source_config.get("config", {})
+    return DatabaseSource(connection_string=config.get("connection_string"), config=config).engine
+
+
+def _is_sql_query(table_or_query):
+    sql = table_or_query.strip().lower()
+    return ";" in sql or "\n" in sql or sql.startswith(("select", "with"))
+
+
+def _relation(table_or_query, schema=None):
+    """FROM clause of a table name (optionally ``schema.table``) or of a SQL query."""
+    if _is_sql_query(table_or_query):
+        return sa.text(f"({table_or_query.strip().rstrip(';')}) q")
+    if schema is None and "." in table_or_query:
+        schema, table_or_query = table_or_query.split(".", 1)
+    return sa.table(table_or_query, schema=schema)
+
+
+def _sqlite_row_hash(*values):
+    text = "|".join(_NULL_TEXT if v is None else str(v) for v in values)
+    return zlib.crc32(text.encode("utf-8"))
+
+
+def _register_sqlite_row_hash(engine):
+    @sa.event.listens_for(engine, "connect")
+    def _connect(dbapi_connection, _):
+        dbapi_connection.create_function(_SQLITE_ROW_HASH, -1, _sqlite_row_hash, deterministic=True)
+
+
+def _row_hash_sql(dialect, preparer, columns):
+    """Sum of a 32-bit hash of every row (None for the dialects without a hash function)."""
+    quoted = [preparer.quote(c) for c in columns]
+    if dialect == "postgresql":
+        values = ", ".join(f"COALESCE({q}::text, '{_NULL_TEXT}')" for q in quoted)
+        return f"SUM(('x' || SUBSTR(MD5(CONCAT_WS('|', {values})), 1, 8))::bit(32)::bigint)"
+    if dialect == "mysql":
+        values = ", ".join(f"COALESCE(CAST({q} AS CHAR), '{_NULL_TEXT}')" for q in quoted)
+        return f"SUM(CRC32(CONCAT_WS('|', {values})))"
+    if dialect == "mssql":
+        return f"SUM(CAST(BINARY_CHECKSUM({', '.join(quoted)}) AS BIGINT))"
+    if dialect == "oracle":
+        values = " || '|' || ".join(f"COALESCE(TO_CHAR({q}), '{_NULL_TEXT}')" for q in quoted)
+        return f"SUM(ORA_HASH({values}))"
+    if dialect == "sqlite":
+        return f"SUM({_SQLITE_ROW_HASH}({', '.join(quoted)}))"
+    return None
+
+
+class _Side:
+    """One side of the comparison: engine, relation and sample."""
+
+    def __init__(self, source_config, table_or_query):
+        self.engine = sql_engine(source_config)
+        if self.engine.dialect.name == "sqlite":
+            _register_sqlite_row_hash(self.engine)
+        self.relation = _relation(table_or_query, source_config.get("config", {}).get("schema"))
+        with self.engine.connect() as conn:
+            self.sample = pd.read_sql(
+                sa.select(sa.text("*")).select_from(self.relation).limit(PUSHDOWN_SAMPLE_ROWS), conn
+            )
+
+    def _select(self, query):
+        with self.engine.connect() as conn:
+            return pd.read_sql(query, conn)
+
+    def key_bounds(self, key):
+        k = sa.column(key, sa.Integer)
+        row = self._select(sa.select(sa.func.min(k).label("lo"), sa.func.max(k).label("hi")).select_from(self.relation))
+        return row["lo"].iloc[0], row["hi"].iloc[0]
+
+    def checksums(self, key, columns, numeric, lo, step, row_hash):
+        """One row of aggregates per key range, indexed by range number ("null" for missing keys)."""
+        k = sa.column(key, sa.Integer)
+        bucket = ((k - lo) // step) if step else sa.case((k.is_(None), sa.null()), else_=sa.literal(0))
+        inner = sa.select(bucket.label(_BUCKET), *[sa.column(c) for c in columns]).select_from(self.relation).subquery("b")
+        aggregates = [sa.func.count().label(_ROWS)]
+        for i, c in enumerate(columns):
+            col = inner.c[c]
+            aggregates += [
+                sa.func.count(col).label(f"n{i}"),
+                sa.func.min(col).label(f"min{i}"),
+                sa.func.max(col).label(f"max{i}"),
+            ]
+            if c in numeric:
+                as_float = col * 1.0
+                aggregates += [sa.func.sum(as_float).label(f"sum{i}"), sa.func.sum(as_float * as_float).label(f"sq{i}")]
+        aggregates.append(sa.literal_column(row_hash).label(_ROW_HASH))
+        df = self._select(sa.select(inner.c[_BUCKET], *aggregates).group_by(inner.c[_BUCKET]))
+        df[_BUCKET] = [_NULL_BUCKET if pd.isna(b) else int(b) for b in df[_BUCKET]]
+        return df.set_index(_BUCKET)
+
+    def fetch(self, key, columns, buckets, lo, step):
+        """Rows of the given key ranges."""
+        k = sa.column(key, sa.Integer)
+        if step:
+            conditions = [
+                k.is_(None) if b == _NULL_BUCKET else sa.and_(k >= lo + b * step, k < lo + (b + 1) * step)
+                for b in buckets
+            ]
+            where = sa.or_(*conditions)
+        else:
+            where = sa.true()
+        query = sa.select(*[sa.column(c) for c in columns]).select_from(self.relation).where(where)
+        return self._select(query)
+
+
+def _numeric(series):
+    return pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+
+
+def _same(a, b, numeric=False):
+    if pd.isna(a) or pd.isna(b):
+        return pd.isna(a) and pd.isna(b)
+    if numeric:
+        # Sums of floats may be accumulated in a different order on each side
+        return abs(float(a) - float(b)) <= 1e-9 * max(abs(float(a)), abs(float(b)))
+    return a == b or str(a) == str(b)
+
+
+def _range_matches(s, t, columns, numeric):
+    """Whether the checksums of one range are identical on both sides."""
+    if s[_ROWS] != t[_ROWS] or not _same(s[_ROW_HASH], t[_ROW_HASH]):
+        return False
+    for i, c in enumerate(columns):
+        aggregates = ["n", "min", "max"] + (["sum", "sq"] if c in numeric else [])
+        if not all(_same(s[f"{a}{i}"], t[f"{a}{i}"], numeric=a in ("sum", "sq")) for a in aggregates):
+            return False
+    return True
+
+
+def compare_pushdown(
+    source_config, target_config, source_table, target_table, id_columns, compare_col_list,
+    abs_tol=0.0001, rel_tol=0, limit=None, source_label="source", target_label="target",
+    ranges=PUSHDOWN_RANGES,
+):
+    """
+    Compare a source and a target table (or query) inside their databases.
+
+    Args:
+        source_config, target_config: database source configurations.
+        source_table, target_table: table names or SQL queries.
+        id_columns: join columns (all compared columns when empty).
+        compare_col_list: compared columns (columns of both sides when empty).
+        ranges: number of key ranges checksummed on each side.
+        Other arguments are those of ``compare_polars``.
+
+    Returns:
+        tuple: (ComparisonStats, pandas DataFrame of the mismatched rows), as ``compare_polars``.
+    """
+    source = _Side(source_config, source_table)
+    target = _Side(target_config, target_table)
+    s_columns, t_columns = list(source.sample.columns), list(target.sample.columns)
+    use_cols = compare_col_list or [c for c in s_columns if c in t_columns]
+    missing_in_source = [col for col in use_cols if col not in s_columns]
+    missing_in_target = [col for col in use_cols if col not in t_columns]
+    if missing_in_source:
+        raise ValueError(f"Columns missing in source {source_label}: {missing_in_source}")
+    if missing_in_target:
+        raise ValueError(f"Columns missing in target {target_label}: {missing_in_target}")
+    columns = list(dict.fromkeys(use_cols + list(id_columns)))
+    id_columns = list(id_columns) or use_cols
+    numeric = {c for c in columns if _numeric(source.sample[c]) and _numeric(target.sample[c])}
+
+    # Integer keys are cut in ranges of equal width, other keys make one range
+    key = id_columns[0]
+    s_lo, s_hi = source.key_bounds(key)
+    t_lo, t_hi = target.key_bounds(key)
+    bounds = [v for v in (s_lo, s_hi, t_lo, t_hi) if not pd.isna(v)]
+    lo, step = 0, 0
+    if bounds and all(isinstance(v, numbers.Integral) for v in bounds):
+        lo, hi = int(min(bounds)), int(max(bounds))
+        step = max(1, -(-(hi - lo + 1) // ranges))
+
+    dialect = source.engine.dialect.name
+    row_hash = None
+    if dialect == target.engine.dialect.name:
+        row_hash = _row_hash_sql(dialect, source.engine.dialect.identifier_preparer, columns)
+
+    matching_rows = 0
+    if row_hash is None:
+        # Without a row hash comparable on both sides, no range can be trusted
+        print(f"[{source_label} vs {target_label}] No row hash shared by both databases, fetching every row")
+        lo, step = 0, 0
+        differing = [0]
+    else:
+        s_sums = source.checksums(key, columns, numeric, lo, step, row_hash)
+        t_sums = target.checksums(key, columns, numeric, lo, step, row_hash)
+        all_ranges = s_sums.index.union(t_sums.index, sort=False)
+        differing = []
+        for bucket in all_ranges:
+            if bucket in s_sums.index and bucket in t_sums.index and _range_matches(
+                s_sums.loc[bucket], t_sums.loc[bucket], columns, numeric
+            ):
+                matching_rows += int(s_sums.loc[bucket, _ROWS])
+            else:
+                differing.append(bucket)
+        print(f"[{source_label} vs {target_label}] {len(differing):,} of {len(all_ranges):,} key ranges differ")
+
+    if differing:
+        stats, mismatches = compare_polars(
+            source.fetch(key, columns, differing, lo, step),
+            target.fetch(key, columns, differing, lo, step),
+            id_columns, columns, abs_tol, rel_tol,
+            limit=limit, source_label=source_label, target_label=target_label,
+        )
+    else:
+        stats = ComparisonStats.empty(source_label, target_label, columns, abs_tol, rel_tol)
+        mismatches = pd.DataFrame(columns=id_columns)
+    stats.add_matching_rows(matching_rows)
+    return stats, mismatches
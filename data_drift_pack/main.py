@@ -1,4 +1,5 @@
 from qalita_core.pack import Pack
+from columnar_loader import load_parquet, numeric_columns
 import pandas as pd
 from scipy import stats
 import numpy as np
@@ -20,32 +21,24 @@ with Pack() as pack:
     else:
         pack.load_data("target")
 
-    def _load_parquet_if_path(obj):
-        try:
-            if isinstance(obj, str) and obj.lower().endswith((".parquet", ".pq")):
-                return pd.read_parquet(obj, engine="pyarrow")
-        except Exception:
-            pass
-        return obj
-
     ref_df = pack.df_source
     cur_df = pack.df_target
 
     if isinstance(ref_df, list) or isinstance(cur_df, list):
-        ref_df = _load_parquet_if_path(ref_df[0] if isinstance(ref_df, list) else ref_df)
-        cur_df = _load_parquet_if_path(cur_df[0] if isinstance(cur_df, list) else cur_df)
+        ref_df = load_parquet(ref_df[0] if isinstance(ref_df, list) else ref_df, columns=numeric_columns)
+        cur_df = load_parquet(cur_df[0] if isinstance(cur_df, list) else cur_df, columns=numeric_columns)
     else:
-        ref_df = _load_parquet_if_path(ref_df)
-        cur_df = _load_parquet_if_path(cur_df)
+        ref_df = load_parquet(ref_df, columns=numeric_columns)
+        cur_df = load_parquet(cur_df, columns=numeric_columns)
 
-    numeric_columns = [
+    drift_columns = [
         c
         for c in ref_df.columns
         if pd.api.types.is_numeric_dtype(ref_df[c]) and c in cur_df.columns
     ]
 
     p_values = []
-    for col in numeric_columns:
+    for col in drift_columns:
         ref = ref_df[col].dropna().values
         cur = cur_df[col].dropna().values
         if len(ref) == 0 or len(cur) == 0:
@@ -1,15 +1,28 @@
 from qalita_core.pack import Pack
+from columnar_loader import load_parquet, parquet_paths as source_parquet_paths, parquet_schema
+from duplicate_fingerprints import (
+    DEFAULT_FINGERPRINT_BITS,
+    HLL_PRECISION,
+    column_distinct_counts,
+    count_duplicates,
+    estimate_distinct,
+)
+from near_duplicates import NEAR_DUPLICATE_THRESHOLD, find_near_duplicates
+from report_writer import ReportWriter, report_options
 import pandas as pd
 import logging
+import math
 from qalita_core.utils import determine_recommendation_level
 from datetime import datetime
 import os
-from qalita_core.aggregation import detect_chunked_from_items, DuplicateAggregator, normalize_and_dedupe_recommendations
+from qalita_core.aggregation import detect_chunked_from_items, normalize_and_dedupe_recommendations
 
 logger = logging.getLogger(__name__)
 
 # Big data configuration
-MAX_DUPLICATES_TO_EXPORT = 10_000  # Limit export to avoid memory issues
+MAX_DUPLICATES_TO_EXPORT = 10_000  # Limit of Excel exports (parquet / CSV reports keep every row)
+DUPLICATE_COUNTING_MODES = ("exact", "approximate")
+DUPLICATION_RATE_THRESHOLD = 0.1  # A score below 0.9 raises a recommendation
 
 # Try to import Polars for efficient duplicate detection
 try:
@@ -20,68 +33,103 @@ except ImportError:
     pl = None
 
 
-def _count_duplicates_polars(paths, uniqueness_columns):
+def _collect(lf):
+    try:
+        return lf.collect(engine="streaming")
+    except Exception:
+        return lf.collect()
+
+
+def _scan_duplicates_polars(paths, uniqueness_columns, limit=MAX_DUPLICATES_TO_EXPORT):
     """
-    Count duplicates using Polars group_by().count() streaming.
-    
-    This is memory-efficient for large datasets as it uses streaming aggregation.
-    
+    Count duplicates and extract duplicate rows with Polars in one execution plan.
+
+    The streaming group_by gives both the row count (sum of the group sizes)
+    and the duplicated keys. Its result is kept and reused for a semi-join
+    that reads rows until ``limit`` duplicate rows are found, and the join is
+    skipped altogether when there is no duplicate or no row to export.
+
     Returns:
-        tuple: (total_rows, total_duplicates)
+        tuple: (total_rows, total_duplicates, duplicate rows: a pandas
+        DataFrame of at most ``limit`` rows, None when ``limit`` is 0, and a
+        Polars lazy frame of all of them, left for the report writer to
+        stream, when ``limit`` is None)
     """
     if not POLARS_AVAILABLE:
         raise ImportError("Polars required for efficient duplicate detection")
-    
+
     lf = pl.scan_parquet(paths)
-    
-    # Get total rows
-    try:
-        total_rows = lf.select(pl.len()).collect(engine="streaming").item()
-    except Exception:
-        total_rows = lf.select(pl.len()).collect().item()
-    
-    # Count unique combinations using group_by
-    # Duplicates = total_rows - unique_combinations
-    unique_count_lf = lf.select(uniqueness_columns).group_by(uniqueness_columns).agg(
-        pl.len().alias("_count")
+    counts = _collect(
+        lf.select(uniqueness_columns).group_by(uniqueness_columns).agg(pl.len().alias("_dup_count"))
     )
-    
-    try:
-        unique_df = unique_count_lf.collect(engine="streaming")
-    except Exception:
-        unique_df = unique_count_lf.collect()
-    
-    # Count duplicates: rows where count > 1 contribute (count - 1) duplicates
-    duplicates = (unique_df["_count"] - 1).clip(0, None).sum()
-    
-    return int(total_rows), int(duplicates)
+    total_rows = int(counts["_dup_count"].sum())
+    # Rows of a key seen n times contribute (n - 1) duplicates
+    total_duplicates = total_rows - counts.height
+
+    if limit == 0:
+        return total_rows, total_duplicates, None
+    dup_keys = counts.filter(pl.col("_dup_count") > 1).drop("_dup_count")
+    if dup_keys.is_empty():
+        return total_rows, total_duplicates, pd.DataFrame()
+    dup_rows_lf = lf.join(dup_keys.lazy(), on=uniqueness_columns, how="semi")
+    if limit is None:
+        return total_rows, total_duplicates, dup_rows_lf
+    dup_rows = _collect(dup_rows_lf.head(limit))
+    return total_rows, total_duplicates, dup_rows.to_pandas()
 
 
-def _get_duplicate_rows_polars(paths, uniqueness_columns, limit=None):
+def _column_distinct_counts_polars(paths, columns, approximate=False):
     """
-    Get actual duplicate rows using Polars (for export).
-    
-    Returns duplicate rows as a pandas DataFrame.
+    Distinct values of every column with a single lazy Polars ``select``.
+
+    Returns:
+        tuple: (total_rows, {column: distinct count}); ``approximate`` uses
+        ``approx_n_unique`` (HyperLogLog) instead of ``n_unique``.
     """
     if not POLARS_AVAILABLE:
-        raise ImportError("Polars required")
-    
+        raise ImportError("Polars required for efficient duplicate detection")
+
     lf = pl.scan_parquet(paths)
-    
-    # Find rows that appear more than once
-    counts_lf = lf.group_by(uniqueness_columns).agg(pl.len().alias("_dup_count"))
-    dup_keys_lf = counts_lf.filter(pl.col("_dup_count") > 1).select(uniqueness_columns)
-    
-    # Join back to get full duplicate rows
-    dup_rows_lf = lf.join(dup_keys_lf, on=uniqueness_columns, how="inner")
-    
-    if limit:
-        dup_rows_lf = dup_rows_lf.head(limit)
-    
-    try:
-        return dup_rows_lf.collect(engine="streaming").to_pandas()
-    except Exception:
-        return dup_rows_lf.collect().to_pandas()
+    expressions = [pl.len().alias("_rows")] + [
+        (pl.col(column).approx_n_unique() if approximate else pl.col(column).n_unique()).alias(column)
+        for column in columns
+    ]
+    row = _collect(lf.select(expressions)).row(0, named=True)
+    total_rows = int(row.pop("_rows"))
+    return total_rows, {column: int(count) for column, count in row.items()}
+
+
+def _approximate_counts(sources, uniqueness_columns, precision):
+    """
+    Estimate duplicates with HyperLogLog sketches merged across sources.
+
+    Returns:
+        tuple: (total_rows, duplicates, distinct_count error bound), or None
+        when the duplication rate could reach DUPLICATION_RATE_THRESHOLD within
+        the error bound (duplicates must then be counted exactly).
+    """
+    sketch = None
+    for source in sources:
+        chunk_sketch = estimate_distinct(source, uniqueness_columns, precision=precision)
+        sketch = chunk_sketch if sketch is None else sketch.merge(chunk_sketch)
+    total_rows = sketch.total_rows
+    distinct_count = int(round(sketch.distinct_count))
+    error_bound = int(math.ceil(sketch.error_bound))
+    if total_rows and (total_rows - distinct_count + error_bound) / total_rows >= DUPLICATION_RATE_THRESHOLD:
+        print(
+            f"Estimated duplication rate {(total_rows - distinct_count) / total_rows:.2%} "
+            f"(± {error_bound / total_rows:.2%}) may raise a recommendation, counting exactly"
+        )
+        return None
+    return total_rows, total_rows - distinct_count, error_bound
+
+
+def _dataset_columns(source):
+    """Column names of a dataset without loading it (parquet footer, or DataFrame columns)."""
+    schema = parquet_schema(source)
+    if schema is not None:
+        return list(schema.names)
+    return list(source.columns) if isinstance(source, pd.DataFrame) else []
 
 
 # --- Chargement des données ---
@@ -100,25 +148,32 @@ with Pack() as pack:
     raw_df_source = pack.df_source
     configured = pack.source_config.get("config", {}).get("table_or_query")
 
-    def _load_parquet_if_path(obj):
-        try:
-            if isinstance(obj, str) and obj.lower().endswith((".parquet", ".pq")):
-                return pd.read_parquet(obj, engine="pyarrow")
-        except Exception:
-            pass
-        return obj
+    # Datasets are not loaded: duplicates are counted by Polars or by streaming
+    # row fingerprints over the parquet batches (uniqueness columns only)
+    job_config = pack.pack_config.get("job", {})
+    fingerprint_bits = job_config.get("fingerprint_bits", DEFAULT_FINGERPRINT_BITS)
+    duplicate_counting = job_config.get("duplicate_counting", "exact")
+    if duplicate_counting not in DUPLICATE_COUNTING_MODES:
+        raise ValueError(
+            f"Unknown duplicate_counting '{duplicate_counting}', expected one of {DUPLICATE_COUNTING_MODES}"
+        )
+    hll_precision = job_config.get("hll_precision", HLL_PRECISION)
+    # Parquet / CSV reports keep every duplicate row unless a limit is set
+    report = report_options(job_config)
+    export_limit = job_config.get(
+        "max_duplicates_to_export", MAX_DUPLICATES_TO_EXPORT if report["report_format"] == "excel" else None
+    )
 
     if isinstance(raw_df_source, list):
-        loaded = [_load_parquet_if_path(x) for x in raw_df_source]
-        if isinstance(configured, (list, tuple)) and len(configured) == len(loaded):
-            items = list(zip(list(configured), loaded))
+        if isinstance(configured, (list, tuple)) and len(configured) == len(raw_df_source):
+            items = list(zip(list(configured), raw_df_source))
             names_for_detect = [str(n) for n in configured]
         else:
             base = pack.source_config["name"]
-            items = [(f"{base}_{i+1}", df) for i, df in enumerate(loaded)]
+            items = [(f"{base}_{i+1}", source) for i, source in enumerate(raw_df_source)]
             names_for_detect = [name for name, _ in items]
     else:
-        items = [(pack.source_config["name"], _load_parquet_if_path(raw_df_source))]
+        items = [(pack.source_config["name"], raw_df_source)]
         names_for_detect = None
 
     raw_items_list = raw_df_source if isinstance(raw_df_source, list) else [raw_df_source]
@@ -130,7 +185,10 @@ with Pack() as pack:
     # Get parquet paths for Polars processing
     parquet_paths = [p for p in raw_items_list if isinstance(p, str) and p.lower().endswith((".parquet", ".pq"))]
     use_polars_direct = POLARS_AVAILABLE and len(parquet_paths) > 0
-    
+    # Rows of the export, when Polars extracts them in the plan that counts duplicates
+    duplicated_rows = None
+    duplicates_estimated = False
+
     if treat_chunks_as_one:
         if (
             "job" in pack.pack_config
@@ -139,76 +197,83 @@ with Pack() as pack:
         ):
             uniqueness_columns = pack.pack_config["job"]["compute_uniqueness_columns"]
         else:
-            uniqueness_columns = list(items[0][1].columns)
+            uniqueness_columns = _dataset_columns(items[0][1])
         
+        counts = None
+        error_bound = None
+        if duplicate_counting == "approximate":
+            approximate = _approximate_counts([source for _, source in items], uniqueness_columns, hll_precision)
+            if approximate is not None:
+                total_rows, total_duplicates, error_bound = approximate
+                counts = (total_rows, total_duplicates)
+                # Estimated counts: duplicate rows are only extracted by exact counting
+                print("Duplicates are estimated, duplicate rows are not exported")
+                duplicated_rows = pd.DataFrame()
+                duplicates_estimated = True
+
         # Try Polars streaming first (most memory efficient)
-        if use_polars_direct:
+        if counts is None and use_polars_direct:
             try:
-                total_rows, total_duplicates = _count_duplicates_polars(parquet_paths, uniqueness_columns)
-                duplication_rate = total_duplicates / total_rows if total_rows > 0 else 0
-                score = max(0.0, min(1.0, 1.0 - duplication_rate))
-                
-                pack.metrics.data.append({
-                    "key": "score", 
-                    "value": str(round(score, 2)), 
-                    "scope": {"perimeter": "dataset", "value": pack.source_config["name"]}
-                })
-                pack.metrics.data.append({
-                    "key": "duplicates", 
-                    "value": int(total_duplicates), 
-                    "scope": {"perimeter": "dataset", "value": pack.source_config["name"]}
-                })
-                #  distinct_count and distinct_percent metrics
-                distinct_count = total_rows - total_duplicates
-                distinct_percent = distinct_count / total_rows if total_rows > 0 else 0
-                pack.metrics.data.append({
-                    "key": "distinct_count", 
-                    "value": int(distinct_count), 
-                    "scope": {"perimeter": "dataset", "value": pack.source_config["name"]}
-                })
-                pack.metrics.data.append({
-                    "key": "distinct_percent", 
-                    "value": str(round(distinct_percent, 4)), 
-                    "scope": {"perimeter": "dataset", "value": pack.source_config["name"]}
-                })
-                
-                if score < 0.9:
-                    pack.recommendations.data.append({
-                        "content": f"dataset '{pack.source_config['name']}' has a duplication rate of {duplication_rate*100:.1f}% on the scope {list(uniqueness_columns)}.",
-                        "type": "Duplicates",
-                        "scope": {"perimeter": "dataset", "value": pack.source_config["name"]},
-                        "level": determine_recommendation_level(duplication_rate),
-                    })
-                
+                total_rows, total_duplicates, duplicated_rows = _scan_duplicates_polars(
+                    parquet_paths, uniqueness_columns, limit=export_limit
+                )
+                counts = (total_rows, total_duplicates)
                 logger.info(f"Polars duplicate detection: {total_duplicates} duplicates out of {total_rows} rows")
             except Exception as e:
-                logger.warning(f"Polars duplicate detection failed: {e}, falling back to pandas aggregator")
+                logger.warning(f"Polars duplicate detection failed: {e}, falling back to row fingerprints")
                 use_polars_direct = False
-        
-        if not use_polars_direct:
-            # Fallback to DuplicateAggregator (pandas-based)
-            dup_agg = DuplicateAggregator(uniqueness_columns)
-            for dataset_label, df_curr in items:
-                dup_agg.add_df(df_curr)
-            metrics, recommendations = dup_agg.finalize_metrics(pack.source_config["name"])
-            pack.metrics.data.extend(metrics)
-            try:
-                score_item = next(m for m in metrics if m.get("key") == "score")
-                score_val = float(score_item.get("value", 1.0))
-                duplication_rate = 1.0 - score_val
-                if score_val < 0.9:
-                    pack.recommendations.data.append(
-                        {
-                            "content": f"dataset '{pack.source_config['name']}' has a duplication rate of {duplication_rate*100}% on the scope {list(uniqueness_columns)}.",
-                            "type": "Duplicates",
-                            "scope": {"perimeter": "dataset", "value": pack.source_config["name"]},
-                            "level": determine_recommendation_level(duplication_rate),
-                        }
-                    )
-            except StopIteration:
-                pass
+
+        if counts is None:
+            # Fallback: streaming row fingerprints, chunk after chunk
+            counter = None
+            for dataset_label, source in items:
+                chunk_counter = count_duplicates(source, uniqueness_columns, bits=fingerprint_bits)
+                counter = chunk_counter if counter is None else counter.merge(chunk_counter)
+            counts = (counter.total_rows, counter.duplicates)
+
+        total_rows, total_duplicates = counts
+        duplication_rate = total_duplicates / total_rows if total_rows > 0 else 0
+        score = max(0.0, min(1.0, 1.0 - duplication_rate))
+
+        pack.metrics.data.append({
+            "key": "score",
+            "value": str(round(score, 2)),
+            "scope": {"perimeter": "dataset", "value": pack.source_config["name"]}
+        })
+        pack.metrics.data.append({
+            "key": "duplicates",
+            "value": int(total_duplicates),
+            "scope": {"perimeter": "dataset", "value": pack.source_config["name"]}
+        })
+        #  distinct_count and distinct_percent metrics
+        distinct_count = total_rows - total_duplicates
+        distinct_percent = distinct_count / total_rows if total_rows > 0 else 0
+        pack.metrics.data.append({
+            "key": "distinct_count",
+            "value": int(distinct_count),
+            "scope": {"perimeter": "dataset", "value": pack.source_config["name"]}
+        })
+        pack.metrics.data.append({
+            "key": "distinct_percent",
+            "value": str(round(distinct_percent, 4)),
+            "scope": {"perimeter": "dataset", "value": pack.source_config["name"]}
+        })
+        if error_bound is not None:
+            pack.metrics.data.append({
+                "key": "distinct_count_error",
+                "value": error_bound,
+                "scope": {"perimeter": "dataset", "value": pack.source_config["name"]}
+            })
+
+        if score < 0.9:
+            pack.recommendations.data.append({
+                "content": f"dataset '{pack.source_config['name']}' has a duplication rate of {duplication_rate*100:.1f}% on the scope {list(uniqueness_columns)}.",
+                "type": "Duplicates",
+                "scope": {"perimeter": "dataset", "value": pack.source_config["name"]},
+                "level": determine_recommendation_level(duplication_rate),
+            })
     else:
-        for dataset_label, df_curr in items:
+        for position, (dataset_label, df_curr) in enumerate(items):
             if (
                 "job" in pack.pack_config
                 and "compute_uniqueness_columns" in pack.pack_config["job"]
@@ -216,13 +281,38 @@ with Pack() as pack:
             ):
                 uniqueness_columns = pack.pack_config["job"]["compute_uniqueness_columns"]
             else:
-                uniqueness_columns = list(df_curr.columns)
+                uniqueness_columns = _dataset_columns(df_curr)
 
             print("Columns used for checking duplicates:", uniqueness_columns)
-            df_subset = df_curr[uniqueness_columns].copy()
-            duplicates = df_subset.duplicated()
-            total_rows = len(df_curr)
-            total_duplicates = duplicates.sum()
+            approximate = None
+            if duplicate_counting == "approximate":
+                approximate = _approximate_counts([df_curr], uniqueness_columns, hll_precision)
+            if approximate is not None:
+                total_rows, total_duplicates, error_bound = approximate
+                if position == 0:
+                    # Estimated counts: duplicate rows are only extracted by exact counting
+                    print("Duplicates are estimated, duplicate rows are not exported")
+                    duplicated_rows = pd.DataFrame()
+                    duplicates_estimated = True
+            else:
+                counts = None
+                dataset_paths = source_parquet_paths(df_curr)
+                if POLARS_AVAILABLE and dataset_paths:
+                    try:
+                        # Duplicate rows of the first dataset (exported) come from the same plan
+                        total_rows, total_duplicates, rows = _scan_duplicates_polars(
+                            dataset_paths, uniqueness_columns, limit=export_limit if position == 0 else 0
+                        )
+                        counts = (total_rows, total_duplicates)
+                        if position == 0:
+                            duplicated_rows = rows
+                    except Exception as e:
+                        logger.warning(f"Polars duplicate detection failed: {e}, falling back to row fingerprints")
+                if counts is None:
+                    counter = count_duplicates(df_curr, uniqueness_columns, bits=fingerprint_bits)
+                    counts = (counter.total_rows, counter.duplicates)
+                total_rows, total_duplicates = counts
+                error_bound = None
 
             print("[", dataset_label, "] total rows "+str(total_rows))
             print("[", dataset_label, "] total duplicates "+str(total_duplicates))
@@ -261,6 +351,14 @@ with Pack() as pack:
                     "scope": {"perimeter": "dataset", "value": dataset_label},
                 }
             )
+            if error_bound is not None:
+                pack.metrics.data.append(
+                    {
+                        "key": "distinct_count_error",
+                        "value": error_bound,
+                        "scope": {"perimeter": "dataset", "value": dataset_label},
+                    }
+                )
             if (
                 "job" in pack.pack_config
                 and "compute_uniqueness_columns" in pack.pack_config["job"]
@@ -285,6 +383,101 @@ with Pack() as pack:
                 }
                 pack.recommendations.data.append(recommendation)
 
+    # Chunks form one dataset for the column and near-duplicate checks
+    if treat_chunks_as_one:
+        whole_datasets = [
+            (pack.source_config["name"], parquet_paths or pd.concat(raw_items_list, ignore_index=True))
+        ]
+    else:
+        whole_datasets = items
+
+    ############################ Per-column uniqueness (every column in one pass)
+    if job_config.get("column_uniqueness", False):
+        approximate_columns = duplicate_counting == "approximate"
+        for dataset_label, source in whole_datasets:
+            columns = _dataset_columns(source)
+            column_counts = None
+            dataset_paths = source_parquet_paths(source)
+            if POLARS_AVAILABLE and dataset_paths:
+                try:
+                    column_counts = _column_distinct_counts_polars(dataset_paths, columns, approximate_columns)
+                except Exception as e:
+                    logger.warning(f"Polars column uniqueness failed: {e}, falling back to row fingerprints")
+            if column_counts is None:
+                column_counts = column_distinct_counts(source, columns, approximate=approximate_columns, precision=hll_precision)
+            total_rows, distinct_counts = column_counts
+
+            for column, distinct in distinct_counts.items():
+                distinct = min(distinct, total_rows)
+                duplicate_count = total_rows - distinct
+                column_scope = {
+                    "perimeter": "column",
+                    "value": column,
+                    "parent_scope": {"perimeter": "dataset", "value": dataset_label},
+                }
+                for key, value in (
+                    ("distinct_count", int(distinct)),
+                    ("distinct_percent", str(round(distinct / total_rows if total_rows > 0 else 0, 4))),
+                    ("duplicate_count", int(duplicate_count)),
+                    ("duplicate_percent", str(round(duplicate_count / total_rows if total_rows > 0 else 0, 4))),
+                ):
+                    pack.metrics.data.append({"key": key, "value": value, "scope": column_scope})
+
+    ############################ Near duplicates (case, accents, whitespace, typos)
+    near_duplicate_rows = pd.DataFrame()
+    if job_config.get("near_duplicates", False):
+        near_threshold = job_config.get("near_duplicate_threshold", NEAR_DUPLICATE_THRESHOLD)
+        near_id_columns = job_config.get("id_columns", [])
+        for dataset_label, source in whole_datasets:
+            near_columns = (
+                job_config.get("near_duplicate_columns")
+                or job_config.get("compute_uniqueness_columns")
+                or _dataset_columns(source)
+            )
+            df_near = load_parquet(source, columns=list(dict.fromkeys(near_id_columns + near_columns)))
+            clusters, normalized_duplicates = find_near_duplicates(df_near, near_columns, near_threshold)
+            # Rows repeating a normalized key are counted apart from the similar ones
+            near_duplicates = len(clusters) - clusters.nunique() - normalized_duplicates
+            near_rate = near_duplicates / len(df_near) if len(df_near) > 0 else 0
+            print("[", dataset_label, "] near duplicates "+str(near_duplicates)+" and normalized duplicates "+str(normalized_duplicates)+" in "+str(clusters.nunique())+" clusters")
+
+            pack.metrics.data.append(
+                {
+                    "key": "near_duplicates",
+                    "value": int(near_duplicates),
+                    "scope": {"perimeter": "dataset", "value": dataset_label},
+                }
+            )
+            pack.metrics.data.append(
+                {
+                    "key": "normalized_duplicates",
+                    "value": int(normalized_duplicates),
+                    "scope": {"perimeter": "dataset", "value": dataset_label},
+                }
+            )
+            pack.metrics.data.append(
+                {
+                    "key": "near_duplicate_clusters",
+                    "value": int(clusters.nunique()),
+                    "scope": {"perimeter": "dataset", "value": dataset_label},
+                }
+            )
+            if near_rate >= DUPLICATION_RATE_THRESHOLD:
+                pack.recommendations.data.append(
+                    {
+                        "content": f"dataset '{dataset_label}' has a near-duplication rate of {near_rate*100:.1f}% on the scope {list(near_columns)}.",
+                        "type": "Duplicates",
+                        "scope": {"perimeter": "dataset", "value": dataset_label},
+                        "level": determine_recommendation_level(near_rate),
+                    }
+                )
+
+            # Clusters of the first dataset with near duplicates are exported
+            if near_duplicate_rows.empty and len(clusters):
+                near_duplicate_rows = df_near.loc[clusters.index[:export_limit]]
+                near_duplicate_rows.insert(0, "cluster", clusters.iloc[:export_limit])
+                near_duplicate_rows = near_duplicate_rows.reset_index()
+                near_duplicate_rows.insert(0, "cluster", near_duplicate_rows.pop("cluster"))
 
     pack.metrics.save()
     pack.recommendations.save()
@@ -296,42 +489,45 @@ with Pack() as pack:
     # Step 2: Identify duplicated rows (for the first dataset only for export simplicity)
     export_uniqueness = (
         pack.pack_config.get("job", {}).get("compute_uniqueness_columns") or 
-        (list(items[0][1].columns) if items else [])
+        (_dataset_columns(items[0][1]) if items else [])
     )
     
-    # Try Polars for efficient duplicate extraction
-    if use_polars_direct and parquet_paths:
+    # Try Polars for efficient duplicate extraction, unless the rows were
+    # already extracted while counting duplicates
+    export_paths = parquet_paths if treat_chunks_as_one else source_parquet_paths(raw_items_list[0])
+    if duplicated_rows is None and use_polars_direct and export_paths:
         try:
-            duplicated_rows = _get_duplicate_rows_polars(
-                parquet_paths, 
-                list(export_uniqueness), 
-                limit=MAX_DUPLICATES_TO_EXPORT
-            )
-            if len(duplicated_rows) >= MAX_DUPLICATES_TO_EXPORT:
-                print(f"Limiting duplicate export to {MAX_DUPLICATES_TO_EXPORT:,} rows")
+            _, _, duplicated_rows = _scan_duplicates_polars(export_paths, list(export_uniqueness), limit=export_limit)
         except Exception as e:
             logger.warning(f"Polars duplicate extraction failed: {e}, falling back to pandas")
-            # Fallback to pandas
-            if isinstance(pack.df_source, list):
-                export_df = items[0][1]
-            else:
-                export_df = _load_parquet_if_path(pack.df_source)
-            export_duplicates = export_df[list(export_uniqueness)].duplicated()
-            duplicated_rows = export_df[export_duplicates].head(MAX_DUPLICATES_TO_EXPORT)
-    else:
-        if isinstance(pack.df_source, list):
-            export_df = items[0][1]
-        else:
-            export_df = _load_parquet_if_path(pack.df_source)
+    if duplicated_rows is None:
+        export_df = load_parquet(raw_items_list[0])
         export_duplicates = export_df[list(export_uniqueness)].duplicated()
-        duplicated_rows = export_df[export_duplicates].head(MAX_DUPLICATES_TO_EXPORT)
+        duplicated_rows = export_df[export_duplicates].iloc[:export_limit]
+    elif export_limit is not None and len(duplicated_rows) >= export_limit:
+        print(f"Limiting duplicate export to {export_limit:,} rows")
 
-    # Check if there are any duplicates
-    if duplicated_rows.empty:
-        print("No duplicates found. No report will be generated.")
+    # Check if there are any duplicates (a lazy frame always holds duplicate rows)
+    lazy_duplicates = POLARS_AVAILABLE and isinstance(duplicated_rows, pl.LazyFrame)
+    if not lazy_duplicates and duplicated_rows.empty and near_duplicate_rows.empty:
+        if duplicates_estimated:
+            print("Duplicate rows are not exported because their count was estimated. No report will be generated.")
+        else:
+            print("No duplicates found. No report will be generated.")
     else:
         # Step 3: Set index or create 'index' column for the Excel export
-        if id_columns:
+        if lazy_duplicates:
+            # Same columns as the DataFrame export: id columns go to the (unwritten) index
+            valid_id_columns = [col for col in id_columns if col in duplicated_rows.collect_schema().names()]
+            if valid_id_columns:
+                duplicated_rows = duplicated_rows.drop(valid_id_columns)
+            elif id_columns:
+                print(
+                    "None of the specified 'id_columns' are in the DataFrame. Using default index."
+                )
+            else:
+                duplicated_rows = duplicated_rows.with_row_index("index").with_columns(pl.col("index").cast(pl.Int64))
+        elif id_columns:
             # Ensure all id_columns are in the DataFrame columns
             valid_id_columns = [col for col in id_columns if col in duplicated_rows.columns]
             if not valid_id_columns:
@@ -354,8 +550,13 @@ with Pack() as pack:
                 f'{current_date}_duplicates_finder_report_{pack.source_config["name"]}.xlsx',
             )
 
-            # Export duplicated rows to an Excel file
-            duplicated_rows.to_excel(
-                report_file_path, index=False
-            )  # Set index=False as 'original_index' is now a column
+            # Export duplicated rows (and near-duplicate clusters): Excel workbook,
+            # or parquet / CSV files with an Excel summary
+            with ReportWriter(report_file_path, **report) as writer:
+                if lazy_duplicates:
+                    writer.sink("Duplicates", duplicated_rows)
+                elif not duplicated_rows.empty:
+                    writer.write("Duplicates", duplicated_rows)
+                if not near_duplicate_rows.empty:
+                    writer.write("Near duplicates", near_duplicate_rows)
             print(f"Duplicated rows have been exported to {report_file_path}")
@@ -0,0 +1,223 @@
+"""
+Near-duplicate detection (``near_duplicates: true``).
+
+Rows whose keys differ only in case, accents, punctuation, whitespace or a few
+typos are grouped in clusters without comparing all pairs of rows:
+
+1. Normalization: the key columns of a row are joined, accents are stripped
+   and everything but lower-case letters and digits becomes a single space.
+   Rows sharing a normalized key are normalized duplicates of each other, and
+   only distinct keys go through the next steps.
+2. MinHash: each normalized key (truncated to ``MAX_KEY_LENGTH`` characters)
+   is cut in character bigrams, and ``MINHASH_PERMUTATIONS`` min-hashes of the
+   bigrams are computed with vectorized numpy operations over batches of keys.
+   Two keys agree on a min-hash with a probability equal to the Jaccard
+   similarity of their bigram sets.
+3. Blocking (LSH): signatures are cut in ``LSH_BANDS`` bands; keys sharing a
+   band land in the same block. Inside a block, keys are sorted by band and
+   only compared to their ``BLOCK_WINDOW - 1`` next neighbors (sorted
+   neighborhood), so oversized blocks never make the comparison quadratic.
+4. Verification: candidate pairs whose share of agreeing min-hashes comes
+   within ``ESTIMATE_MARGIN`` of the threshold get their exact bigram Jaccard
+   similarity computed, and are kept when it reaches the threshold.
+5. Clustering: keys with the most similar keys become cluster centers, and a
+   key only joins a cluster when it is similar to its center, so clusters
+   never grow by chaining (A like B, B like C, C unlike A).
+
+Work is linear in the number of rows (``LSH_BANDS * (BLOCK_WINDOW - 1)``
+candidate pairs per key at most), on top of one sort per band.
+"""
+
+import numpy as np
+import pandas as pd
+
+MAX_KEY_LENGTH = 64  # Characters of the normalized key that are compared
+MINHASH_PERMUTATIONS = 64
+LSH_BANDS = 16  # Bands of MINHASH_PERMUTATIONS / LSH_BANDS min-hashes
+BLOCK_WINDOW = 10
+NEAR_DUPLICATE_THRESHOLD = 0.7  # Jaccard similarity of the key bigrams
+ESTIMATE_MARGIN = 0.2  # Pairs estimated this far below the threshold are still verified
+SIGNATURE_BATCH_ROWS = 50_000
+_SEED = 20240917
+_NO_BIGRAM = np.uint16(0xFFFF)  # Padding of the bigram sets (not a bigram of normalized keys)
+
+
+def normalize_keys(df, columns):
+    """Normalized key of every row: joined ``columns``, ASCII, lower case, single spaces."""
+    keys = pd.Series("", index=df.index)
+    for column in columns:
+        keys = keys + " " + df[column].astype(str).where(df[column].notna(), "")
+    return (
+        keys.str.normalize("NFKD")
+        .str.encode("ascii", errors="ignore")
+        .str.decode("ascii")
+        .str.lower()
+        .str.replace(r"[^a-z0-9]+", " ", regex=True)
+        .str.strip()
+        .str.slice(0, MAX_KEY_LENGTH)
+    )
+
+
+def _hash_coefficients(n):
+    rng = np.random.default_rng(_SEED)
+    a = rng.integers(1, 2 ** 63, size=n, dtype=np.uint64) | np.uint64(1)  # odd multipliers
+    b = rng.integers(0, 2 ** 63, size=n, dtype=np.uint64)
+    return a, b
+
+
+def minhash_signatures(keys, permutations=MINHASH_PERMUTATIONS, batch_rows=SIGNATURE_BATCH_ROWS):
+    """
+    MinHash signatures (uint32, one row per key) of the character bigrams of ``keys``.
+
+    Keys shorter than two characters have no bigram and get an all-ones signature.
+    """
+    chars = np.asarray(keys, dtype=f"S{MAX_KEY_LENGTH}")
+    lengths = np.char.str_len(chars)
+    codes = np.frombuffer(chars.tobytes(), dtype=np.uint8).reshape(len(chars), MAX_KEY_LENGTH)
+    a, b = _hash_coefficients(permutations)
+    signatures = np.empty((len(chars), permutations), dtype=np.uint32)
+    positions = np.arange(MAX_KEY_LENGTH - 1)
+    for start in range(0, len(chars), batch_rows):
+        block = codes[start:start + batch_rows].astype(np.uint64)
+        bigrams = (block[:, :-1] << np.uint64(8)) | block[:, 1:]
+        invalid = positions[None, :] >= (lengths[start:start + batch_rows, None] - 1)
+        for k in range(permutations):
+            # Multiply-shift hashing: the high 32 bits of a * x + b
+            hashed = ((bigrams * a[k] + b[k]) >> np.uint64(32)).astype(np.uint32)
+            hashed[invalid] = np.iinfo(np.uint32).max
+            signatures[start:start + batch_rows, k] = hashed.min(axis=1)
+    return signatures
+
+
+def _band_keys(signatures, bands):
+    """One uint64 key per row and band (hash of the band's min-hashes)."""
+    rows = signatures.shape[1] // bands
+    keys = np.empty((len(signatures), bands), dtype=np.uint64)
+    for band in range(bands):
+        key = np.full(len(signatures), band, dtype=np.uint64)
+        for value in signatures[:, band * rows:(band + 1) * rows].T.astype(np.uint64):
+            key = (key ^ value) * np.uint64(0x100000001B3)  # FNV-1a style mixing
+        keys[:, band] = key
+    return keys
+
+
+def candidate_pairs(signatures, bands=LSH_BANDS, window=BLOCK_WINDOW, valid=None):
+    """
+    Pairs of rows sharing at least one LSH band, among the ``window - 1`` next rows in band order.
+
+    Returns:
+        (left, right) arrays of row positions with ``left < right``, without repeats.
+    """
+    n = len(signatures)
+    rows = np.arange(n) if valid is None else np.flatnonzero(valid)
+    band_keys = _band_keys(signatures[rows], bands)
+    pairs = []
+    for band in range(bands):
+        key = band_keys[:, band]
+        order = np.argsort(key, kind="stable")
+        sorted_key = key[order]
+        for offset in range(1, window):
+            same = sorted_key[offset:] == sorted_key[:-offset]
+            if not same.any():
+                break
+            left = rows[order[:-offset][same]]
+            right = rows[order[offset:][same]]
+            pairs.append(np.minimum(left, right).astype(np.int64) * n + np.maximum(left, right))
+    if not pairs:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    encoded = np.unique(np.concatenate(pairs))
+    return encoded // n, encoded % n
+
+
+def _bigram_sets(keys):
+    """Sorted distinct bigram codes of every key (uint16, padded with the largest code)."""
+    chars = np.asarray(keys, dtype=f"S{MAX_KEY_LENGTH}")
+    lengths = np.char.str_len(chars)
+    codes = np.frombuffer(chars.tobytes(), dtype=np.uint8).reshape(len(chars), MAX_KEY_LENGTH).astype(np.uint16)
+    bigrams = (codes[:, :-1] << np.uint16(8)) | codes[:, 1:]
+    bigrams[np.arange(MAX_KEY_LENGTH - 1)[None, :] >= (lengths[:, None] - 1)] = _NO_BIGRAM
+    bigrams.sort(axis=1)
+    bigrams[:, 1:][bigrams[:, 1:] == bigrams[:, :-1]] = _NO_BIGRAM
+    bigrams.sort(axis=1)
+    return bigrams
+
+
+def jaccard_similarity(bigram_sets, left, right):
+    """Exact Jaccard similarity of the bigram sets of every (left, right) pair of keys."""
+    sizes = (bigram_sets != _NO_BIGRAM).sum(axis=1)
+    merged = np.sort(np.concatenate([bigram_sets[left], bigram_sets[right]], axis=1), axis=1)
+    common = ((merged[:, 1:] == merged[:, :-1]) & (merged[:, 1:] != _NO_BIGRAM)).sum(axis=1)
+    return common / np.maximum(sizes[left] + sizes[right] - common, 1)
+
+
+def _center_clusters(n, left, right):
+    """
+    Center of the cluster of every key: keys with the most similar keys are
+    taken as centers first and get their unassigned similar keys.
+    """
+    centers = np.full(n, -1)
+    nodes = np.concatenate([left, right])
+    neighbors = np.concatenate([right, left])
+    order = np.argsort(nodes, kind="stable")
+    nodes, neighbors = nodes[order], neighbors[order]
+    degree = np.bincount(nodes, minlength=n)
+    starts = np.concatenate([[0], np.cumsum(degree)])
+    for node in np.lexsort((np.arange(n), -degree)):
+        if degree[node] == 0:
+            break
+        if centers[node] >= 0:
+            continue
+        candidates = neighbors[starts[node]:starts[node + 1]]
+        centers[candidates[centers[candidates] < 0]] = node
+        centers[node] = node
+    unassigned = centers < 0
+    centers[unassigned] = np.flatnonzero(unassigned)
+    return centers
+
+
+def find_near_duplicates(df, columns, threshold=NEAR_DUPLICATE_THRESHOLD):
+    """
+    Clusters of near-duplicate rows of ``df`` on ``columns``.
+
+    Args:
+        df: dataset (any index).
+        columns: key columns compared.
+        threshold: minimum Jaccard similarity of the key bigrams.
+
+    Returns:
+        tuple: (pandas.Series of the cluster number (from 1, largest clusters
+        first) of every row belonging to a cluster of at least two rows,
+        indexed like ``df``; number of these rows repeating the normalized
+        key of another row of their cluster)
+    """
+    keys = normalize_keys(df, columns)
+    valid = keys.str.len().to_numpy() >= 2
+    key_codes, distinct_keys = pd.factorize(keys.where(valid))
+    distinct_keys = distinct_keys.to_numpy(dtype=object)
+    if not len(distinct_keys):
+        return pd.Series(dtype=np.int64, index=df.index[:0], name="cluster"), 0
+
+    signatures = minhash_signatures(distinct_keys)
+    left, right = candidate_pairs(signatures)
+    bigram_sets = _bigram_sets(distinct_keys)
+    similar = np.zeros(len(left), dtype=bool)
+    for start in range(0, len(left), SIGNATURE_BATCH_ROWS):
+        batch_left = left[start:start + SIGNATURE_BATCH_ROWS]
+        batch_right = right[start:start + SIGNATURE_BATCH_ROWS]
+        estimate = (signatures[batch_left] == signatures[batch_right]).mean(axis=1)
+        candidates = np.flatnonzero(estimate >= threshold - ESTIMATE_MARGIN)
+        exact = jaccard_similarity(bigram_sets, batch_left[candidates], batch_right[candidates])
+        similar[start + candidates[exact >= threshold]] = True
+    left, right = left[similar], right[similar]
+    key_centers = _center_clusters(len(distinct_keys), left, right)
+
+    # Rows without a valid key (code -1) stay alone
+    labels = np.where(key_codes >= 0, key_centers[key_codes], len(distinct_keys) + np.arange(len(df)))
+    sizes = np.bincount(labels)
+    members = np.flatnonzero(sizes[labels] > 1)
+    roots, inverse = np.unique(labels[members], return_inverse=True)
+    rank = np.empty(len(roots), dtype=np.int64)
+    rank[np.lexsort((roots, -sizes[roots]))] = np.arange(1, len(roots) + 1)
+    clusters = pd.Series(rank[inverse], index=df.index[members], name="cluster")
+    normalized_duplicates = len(members) - len(np.unique(key_codes[members]))
+    return clusters.sort_values(kind="stable"), normalized_duplicates
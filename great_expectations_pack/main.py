@@ -1,5 +1,5 @@
 from qalita_core.pack import Pack
-import pandas as pd
+from columnar_loader import load_parquet
 from great_expectations.dataset import PandasDataset
 
 
@@ -16,20 +16,12 @@ with Pack() as pack:
     else:
         pack.load_data("source")
 
-    def _load_parquet_if_path(obj):
-        try:
-            if isinstance(obj, str) and obj.lower().endswith((".parquet", ".pq")):
-                return pd.read_parquet(obj, engine="pyarrow")
-        except Exception:
-            pass
-        return obj
-
     df = pack.df_source
     if isinstance(df, list):
-        loaded = [_load_parquet_if_path(x) for x in df]
+        loaded = [load_parquet(x) for x in df]
         dataset_items = [(name, data) for name, data in zip(pack.source_config.get("config", {}).get("table_or_query", []), loaded)]
     else:
-        dataset_items = [(pack.source_config["name"], _load_parquet_if_path(df))]
+        dataset_items = [(pack.source_config["name"], load_parquet(df))]
 
     suite_name = pack.pack_config.get("job", {}).get("suite_name", "qalita_default_suite")
     expectations = pack.pack_config.get("job", {}).get("expectations", [])
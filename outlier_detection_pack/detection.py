@@ -0,0 +1,277 @@
+"""
+Per-dataset outlier detection, run in the pack process or in worker processes.
+
+``score_dataset`` loads one dataset (a table, a file or one chunk of a folder
+source), scores it with the configured detector and reduces the result to a
+small picklable state: per-column normality and outlier counts, the dataset
+normality and the outlier tables. The pack merges these states (into the
+``OutlierAggregator`` for chunked sources), so only the datasets being scored
+are ever loaded, whatever the number of chunks.
+
+Everything a worker needs lives at module level: the pack's main.py runs at
+import time and must never be imported by a worker.
+"""
+
+import numpy as np
+import pandas as pd
+
+from columnar_loader import (
+    STREAMING_BATCH_ROWS,
+    is_parquet_path,
+    iter_parquet_batches,
+    load_parquet_with_sampling,
+    parquet_paths,
+)
+from preprocessing import column_statistics, scorable_columns
+from univariate_outliers import score_univariate_columns
+from multivariate_outliers import (
+    APPROXIMATION_TOLERANCE,
+    CANDIDATES_PER_NEIGHBOR,
+    DEFAULT_NEIGHBOR_BACKEND,
+    ONEHOT_MAX_CATEGORIES,
+    FeatureEncoder,
+    multivariate_knn_scores,
+)
+from streaming_outliers import detect_outliers_streaming
+
+# Big data configuration for outlier detection
+MAX_ROWS_FOR_FULL_KNN = 100_000  # KNN training sample size
+MAX_ROWS_FOR_FULL_LOAD = 1_000_000  # Sample if more than 1M rows
+SAMPLE_SIZE_FOR_LARGE_DATASETS = 500_000
+DETECTORS = ("knn", "streaming")
+EPSILON = 1e-7  # Small number to prevent division by zero
+
+
+def detection_options(job_config, sampling):
+    """Settings of ``score_dataset`` read from the pack's ``job`` configuration (a picklable dict)."""
+    detector = job_config.get("detector", "knn")
+    if detector not in DETECTORS:
+        raise ValueError(f"Unknown detector '{detector}', expected one of {DETECTORS}")
+    return {
+        "detector": detector,
+        "outlier_threshold": job_config.get("outlier_threshold", 0.5),
+        "id_columns": job_config.get("id_columns", []),
+        "multivariate_neighbors": job_config.get("multivariate_neighbors", DEFAULT_NEIGHBOR_BACKEND),
+        "multivariate_components": job_config.get("multivariate_components"),
+        "multivariate_candidates": job_config.get("multivariate_candidates", CANDIDATES_PER_NEIGHBOR),
+        "multivariate_tolerance": job_config.get("multivariate_tolerance", APPROXIMATION_TOLERANCE),
+        "onehot_max_categories": job_config.get("onehot_max_categories", ONEHOT_MAX_CATEGORIES),
+        "sampling": sampling,
+        # Threads scoring the columns of a dataset (None: up to the CPU count);
+        # set by the pack when datasets are scored in worker processes
+        "column_workers": None,
+    }
+
+
+def load_dataset(source, options):
+    """Load parquet with automatic sampling for large datasets (other sources are returned as is)."""
+    if options["detector"] == "streaming":
+        return source  # Read chunk by chunk by the streaming detector
+    try:
+        if is_parquet_path(source) or isinstance(source, list):
+            df, is_sampled, orig_rows, sampling_info = load_parquet_with_sampling(
+                source if isinstance(source, list) else [source],
+                MAX_ROWS_FOR_FULL_LOAD,
+                SAMPLE_SIZE_FOR_LARGE_DATASETS,
+                sampling=options["sampling"],
+            )
+            return df
+    except Exception:
+        pass
+    return source
+
+
+def detect_knn(dataset_label, df_curr, source, options):
+    """KNN detector on a loaded dataset (same result layout as detect_outliers_streaming)."""
+    id_columns = options["id_columns"]
+    outlier_threshold = options["outlier_threshold"]
+
+    # Column means and null counts in one pass; missing numeric values are
+    # filled with the means when scoring and the frame itself is left as is.
+    # Columns with missing values that cannot be filled are left out.
+    means, null_counts = column_statistics(df_curr, parquet_paths(source))
+    columns = scorable_columns(df_curr.columns, means, null_counts)
+
+    # Verify dataset has enough rows for KNN (n_neighbors < n_samples_fit)
+    knn_default_neighbors = 5
+    min_required_samples = knn_default_neighbors + 1
+    if len(df_curr) < min_required_samples:
+        raise ValueError(
+            f"[{dataset_label}] Dataset too small for KNN: at least {min_required_samples} rows required (current: {len(df_curr)})."
+        )
+
+    # Sample data for KNN training if dataset is large (seeded: the same rows
+    # whether the dataset is scored in the pack process or in a worker)
+    n_rows = len(df_curr)
+    use_knn_sample = n_rows > MAX_ROWS_FOR_FULL_KNN
+    knn_sample_idx = None
+    if use_knn_sample:
+        rng = np.random.default_rng(options["sampling"]["seed"])
+        knn_sample_idx = rng.choice(n_rows, size=MAX_ROWS_FOR_FULL_KNN, replace=False)
+        print(f"Using {MAX_ROWS_FOR_FULL_KNN:,} sample for KNN training (dataset has {n_rows:,} rows)")
+
+    # KNN scores of every numeric column in one batched, parallel pass
+    # (trained on the sample for large datasets, scored on all rows)
+    univariate_columns = [
+        col for col in columns
+        if col not in id_columns and pd.api.types.is_numeric_dtype(df_curr[col])
+    ]
+    column_scores = score_univariate_columns(
+        df_curr, univariate_columns, train_idx=knn_sample_idx, fill_values=means,
+        max_workers=options["column_workers"],
+    )
+    column_results = {}
+    for column in univariate_columns:
+        scores = column_scores[column]
+        inlier_score = 1 - scores / (scores.max() + EPSILON)
+        column_results[column] = (
+            float(inlier_score.mean().item()),
+            df_curr.loc[inlier_score < outlier_threshold, id_columns + [column]],
+        )
+
+    # Sparse float32 features: numeric columns, one-hot / frequency encoded categoricals
+    feature_columns = [col for col in columns if col not in id_columns]
+    encoder = FeatureEncoder(onehot_max_categories=options["onehot_max_categories"], fill_values=means).fit(
+        df_curr,
+        [col for col in feature_columns if pd.api.types.is_numeric_dtype(df_curr[col])],
+        [col for col in feature_columns if not pd.api.types.is_numeric_dtype(df_curr[col])],
+    )
+    features = encoder.transform(df_curr)
+    dataset_normality = None
+    multivariate_outliers = pd.DataFrame()
+    try:
+        # Index built on the training sample, every row scored in bounded batches
+        approximate_options = {}
+        if options["multivariate_neighbors"] == "approximate":
+            approximate_options = {
+                "n_components": options["multivariate_components"],
+                "candidates_per_neighbor": options["multivariate_candidates"],
+                "tolerance": options["multivariate_tolerance"],
+            }
+        scores = multivariate_knn_scores(
+            features, train_idx=knn_sample_idx, backend=options["multivariate_neighbors"], **approximate_options
+        )
+        inlier_score = 1 - scores / (scores.max() + EPSILON)
+        dataset_normality = float(inlier_score.mean().item())
+        multivariate_outliers = df_curr.loc[inlier_score < outlier_threshold, columns]
+    except ValueError as e:
+        print(f"[{dataset_label}] Error fitting the model: {e}")
+
+    return {
+        "rows": n_rows,
+        "columns": column_results,
+        "normality": dataset_normality,
+        "multivariate_outliers": multivariate_outliers,
+    }
+
+
+def detect_streaming(source, options):
+    """Robust z-score / Isolation Forest detector reading the dataset chunk by chunk."""
+    sampling = options["sampling"]
+    if isinstance(source, pd.DataFrame):
+        def chunks():
+            for start in range(0, len(source), STREAMING_BATCH_ROWS):
+                yield source.iloc[start:start + STREAMING_BATCH_ROWS]
+
+        def train_sample(columns):
+            if len(source) <= MAX_ROWS_FOR_FULL_KNN:
+                return source[columns]
+            return source[columns].sample(n=MAX_ROWS_FOR_FULL_KNN, random_state=sampling["seed"])
+    else:
+        paths = parquet_paths(source)
+
+        def chunks():
+            return iter_parquet_batches(paths)
+
+        def train_sample(columns):
+            df, _, _, _ = load_parquet_with_sampling(
+                paths, MAX_ROWS_FOR_FULL_KNN, MAX_ROWS_FOR_FULL_KNN, sampling=sampling, columns=columns
+            )
+            return df
+
+    return detect_outliers_streaming(
+        chunks,
+        train_sample,
+        options["id_columns"],
+        options["outlier_threshold"],
+        seed=sampling["seed"],
+        onehot_max_categories=options["onehot_max_categories"],
+    )
+
+
+def univariate_outlier_tables(univariate_outliers, id_columns):
+    """
+    Long and wide tables of univariate outliers, built with a single concatenation.
+
+    Args:
+        univariate_outliers: column -> outlier rows (id columns and the column),
+            indexed by row position in the dataset.
+        id_columns: identifier columns.
+
+    Returns:
+        tuple: (long table ``index, *id_columns, OutlierAttribute, value``,
+        wide table ``index, *id_columns, OutlierAttribute`` followed by one
+        column per outlier column, filled on the rows of that column only)
+    """
+    attributes = [column for column, outliers in univariate_outliers.items() if len(outliers)]
+    head = ["index"] + id_columns + ["OutlierAttribute"]
+    if not attributes:
+        return pd.DataFrame(columns=head + ["value"]), pd.DataFrame(columns=head)
+    parts = [univariate_outliers[column] for column in attributes]
+    wide = pd.concat(parts)
+    index = wide.index.to_numpy()
+    wide = wide.reset_index(drop=True)
+    wide.insert(0, "index", index)
+    wide.insert(len(id_columns) + 1, "OutlierAttribute", np.repeat(attributes, [len(part) for part in parts]))
+    long = wide[head].copy()
+    long["value"] = pd.concat(
+        [part[column] for column, part in zip(attributes, parts)], ignore_index=True
+    )
+    return long, wide
+
+
+def multivariate_outlier_table(multivariate_outliers, id_columns):
+    """Multivariate outlier rows as ``index, *id_columns, OutlierAttribute`` followed by the other columns."""
+    table = multivariate_outliers.reset_index(drop=True)
+    table.insert(0, "index", multivariate_outliers.index.to_numpy())
+    table["OutlierAttribute"] = "Multivariate"
+    head = ["index"] + id_columns + ["OutlierAttribute"]
+    return table[head + [col for col in table.columns if col not in head]]
+
+
+def score_dataset(dataset_label, source, options):
+    """
+    Load, score and reduce one dataset.
+
+    Args:
+        dataset_label: name of the dataset (or chunk) in metrics and logs.
+        source: raw item of ``pack.df_source`` (parquet path(s) or DataFrame).
+        options: dict returned by ``detection_options``.
+
+    Returns:
+        dict: picklable partial state with ``label``, ``rows``, ``columns``
+        (column -> (mean normality, outlier count)), ``normality`` (None when
+        the multivariate model could not be fitted), ``multivariate_outliers``
+        (count) and the ``univariate_table``, ``univariate_wide`` and
+        ``multivariate_table`` exports.
+    """
+    if options["detector"] == "streaming":
+        result = detect_streaming(source, options)
+    else:
+        result = detect_knn(dataset_label, load_dataset(source, options), source, options)
+
+    id_columns = options["id_columns"]
+    univariate_outliers = {column: outliers for column, (_, outliers) in result["columns"].items()}
+    univariate_table, univariate_wide = univariate_outlier_tables(univariate_outliers, id_columns)
+    return {
+        "label": dataset_label,
+        "rows": result["rows"],
+        "columns": {
+            column: (normality, len(outliers)) for column, (normality, outliers) in result["columns"].items()
+        },
+        "normality": result["normality"],
+        "multivariate_outliers": len(result["multivariate_outliers"]),
+        "univariate_table": univariate_table,
+        "univariate_wide": univariate_wide,
+        "multivariate_table": multivariate_outlier_table(result["multivariate_outliers"], id_columns),
+    }
@@ -0,0 +1,77 @@
+"""
+Missing-value handling of the outlier detectors.
+
+Means of the numeric columns and null counts of every column are computed in
+one pass: a lazy Polars scan of the parquet files when possible (the loaded
+frame is not touched), otherwise one vectorized pass over the DataFrame.
+Missing numeric values are filled with these means when values are extracted
+for scoring (``impute``), so the loaded frame is never rewritten. Columns
+whose missing values cannot be filled (non-numeric or entirely empty columns)
+are left out of the scoring.
+"""
+
+import logging
+
+import numpy as np
+
+from columnar_loader import POLARS_AVAILABLE, pl, scan_parquet
+
+logger = logging.getLogger(__name__)
+
+
+def _parquet_statistics(paths):
+    lf = scan_parquet(paths)
+    schema = lf.collect_schema()
+    numeric = [name for name, dtype in schema.items() if dtype.is_numeric()]
+    # NaN counts as missing, as in pandas (Polars null_count / mean see it as a value)
+    values = {name: pl.col(name).fill_nan(None) if dtype.is_float() else pl.col(name) for name, dtype in schema.items()}
+    row = lf.select(
+        [values[name].null_count().alias(f"nulls:{name}") for name in schema.names()]
+        + [values[name].mean().alias(f"mean:{name}") for name in numeric]
+    ).collect().row(0)
+    n_columns = len(schema)
+    null_counts = dict(zip(schema.names(), row[:n_columns]))
+    means = {name: value for name, value in zip(numeric, row[n_columns:]) if value is not None}
+    return means, null_counts
+
+
+def column_statistics(df, paths=None):
+    """
+    Means of numeric columns and null counts of all columns.
+
+    Args:
+        df: loaded DataFrame.
+        paths: parquet files ``df`` was loaded from, scanned lazily with Polars
+            instead of ``df`` when Polars is installed.
+
+    Returns:
+        tuple: (means, null_counts) dicts keyed by column; columns without any
+        value have no mean.
+    """
+    if paths and POLARS_AVAILABLE:
+        try:
+            return _parquet_statistics(paths)
+        except Exception as e:
+            logger.warning(f"Lazy column statistics failed ({e}), computing them on the loaded frame")
+    means = df.mean(numeric_only=True)
+    return means[means.notna()].to_dict(), df.isna().sum().to_dict()
+
+
+def scorable_columns(columns, means, null_counts):
+    """Columns without missing values, or whose missing values are filled with their mean."""
+    return [c for c in columns if not null_counts.get(c) or c in means]
+
+
+def impute(values, fill_value):
+    """Copy of ``values`` (any shape) with NaN replaced by ``fill_value`` (broadcast), or ``values`` itself without NaN."""
+    missing = np.isnan(values)
+    if not missing.any():
+        return values
+    return np.where(missing, fill_value, values)
+
+
+def impute_frame(df, columns, means, dtype=np.float64):
+    """2-D array of ``columns`` with missing values filled with ``means``."""
+    values = df[columns].to_numpy(dtype=dtype, na_value=np.nan)
+    fill = np.array([means.get(c, np.nan) for c in columns], dtype=dtype)
+    return impute(values, fill)
@@ -0,0 +1,243 @@
+"""
+Streaming outlier detectors (``detector: "streaming"``).
+
+Cheap alternative to the KNN detector: the dataset is read twice as a stream
+of chunks (parquet row groups) and never held in memory as a whole.
+
+- Univariate: robust z-score ``(x - median) / (1.4826 * MAD)``. Median and
+  MAD of every numeric column come from a mergeable quantile sketch built
+  during the first pass.
+- Multivariate: Isolation Forest trained on a sample of the dataset. Anomaly
+  scores of all rows are turned into robust z-scores relative to the scores of
+  the training sample (only scores above the typical score count).
+
+A robust z-score ``z`` gives the inlier score ``1 / (1 + (z / ROBUST_Z_CUTOFF)^2)``:
+1 at the median and 0.5 at ``|z| = 3.5`` (Iglewicz & Hoaglin cutoff), so the
+default ``outlier_threshold`` of 0.5 flags values beyond that cutoff.
+"""
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import IsolationForest
+
+from multivariate_outliers import ONEHOT_MAX_CATEGORIES, FeatureEncoder
+from preprocessing import impute, scorable_columns
+
+ROBUST_Z_CUTOFF = 3.5
+MAD_TO_SIGMA = 1.4826  # MAD of a normal distribution is 0.6745 sigma
+MEAN_AD_TO_SIGMA = 1.253314  # Fallback when more than half of the values are equal
+SKETCH_CAPACITY = 8192  # Values kept per sketch level
+ISOLATION_FOREST_TREES = 100
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch (KLL-style compactors).
+
+    Level ``i`` holds values of weight ``2**i``. When a level exceeds
+    ``capacity`` values it is sorted and every other value (random offset) is
+    promoted to the next level, so memory stays around
+    ``capacity * log2(n / capacity)`` values and rank errors stay within a
+    fraction of a percent.
+    """
+
+    def __init__(self, capacity=SKETCH_CAPACITY, seed=0):
+        self.capacity = capacity
+        self.levels = []
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        self._push(0, values[~np.isnan(values)])
+
+    def merge(self, other):
+        for level, values in enumerate(other.levels):
+            self._push(level, values)
+        return self
+
+    def _push(self, level, values):
+        while len(values):
+            if level == len(self.levels):
+                self.levels.append(np.empty(0))
+            buffer = np.concatenate([self.levels[level], values])
+            if len(buffer) <= self.capacity:
+                self.levels[level] = buffer
+                return
+            buffer.sort()
+            even = len(buffer) - len(buffer) % 2
+            self.levels[level] = buffer[even:]
+            values = buffer[self._rng.integers(2):even:2]
+            level += 1
+
+    def weighted_values(self):
+        """(values, weights) summarizing every value seen so far."""
+        values = np.concatenate(self.levels) if self.levels else np.empty(0)
+        weights = np.concatenate([np.full(len(v), 2.0 ** i) for i, v in enumerate(self.levels)]) if self.levels else np.empty(0)
+        return values, weights
+
+
+def _weighted_median(values, weights):
+    order = np.argsort(values)
+    cumulative = np.cumsum(weights[order])
+    return values[order][np.searchsorted(cumulative, cumulative[-1] / 2)]
+
+
+def robust_location_scale(values, weights=None):
+    """
+    Median and robust standard deviation (MAD based) of weighted values.
+
+    Falls back to the mean absolute deviation when the MAD is 0; the scale is
+    0 only for constant data.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) == 0:
+        return np.nan, np.nan
+    weights = np.ones(len(values)) if weights is None else np.asarray(weights, dtype=np.float64)
+    median = _weighted_median(values, weights)
+    deviations = np.abs(values - median)
+    scale = MAD_TO_SIGMA * _weighted_median(deviations, weights)
+    if scale == 0:
+        scale = MEAN_AD_TO_SIGMA * np.average(deviations, weights=weights)
+    return median, scale
+
+
+def robust_z(values, location, scale):
+    """Absolute robust z-scores; any deviation from constant data is infinite."""
+    deviations = np.abs(np.asarray(values, dtype=np.float64) - location)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(deviations == 0, 0.0, deviations / scale)
+
+
+def robust_inlier_score(z):
+    return 1.0 / (1.0 + (np.asarray(z) / ROBUST_Z_CUTOFF) ** 2)
+
+
+class _ColumnProfile:
+    """First-pass statistics of a dataset: null counts, means and quantile sketches."""
+
+    def __init__(self):
+        self.rows = 0
+        self.numeric = None
+        self.nulls = {}
+        self.sums = {}
+        self.counts = {}
+        self.sketches = {}
+
+    def update(self, chunk):
+        if self.numeric is None:
+            self.numeric = [c for c in chunk.columns if pd.api.types.is_numeric_dtype(chunk[c])]
+            self.sketches = {c: QuantileSketch(seed=i) for i, c in enumerate(self.numeric)}
+        self.rows += len(chunk)
+        for column, count in chunk.isnull().sum().items():
+            self.nulls[column] = self.nulls.get(column, 0) + int(count)
+        for column in self.numeric:
+            values = chunk[column].to_numpy(dtype=np.float64, na_value=np.nan)
+            valid = values[~np.isnan(values)]
+            self.sums[column] = self.sums.get(column, 0.0) + float(valid.sum())
+            self.counts[column] = self.counts.get(column, 0) + len(valid)
+            self.sketches[column].update(valid)
+
+    def means(self):
+        return {c: self.sums[c] / self.counts[c] for c in self.numeric if self.counts.get(c)}
+
+
+class _MultivariateModel:
+    """Isolation Forest over the sparse features of FeatureEncoder, fitted on a sample."""
+
+    def __init__(self, train_df, numeric_columns, seed, onehot_max_categories=ONEHOT_MAX_CATEGORIES, fill_values=None):
+        self.encoder = FeatureEncoder(onehot_max_categories=onehot_max_categories, fill_values=fill_values).fit(
+            train_df, numeric_columns
+        )
+        self.forest = IsolationForest(n_estimators=ISOLATION_FOREST_TREES, random_state=seed)
+        self.forest.fit(self.encoder.transform(train_df))
+        self.location, self.scale = robust_location_scale(self._anomaly(train_df))
+
+    def _anomaly(self, df):
+        return -self.forest.score_samples(self.encoder.transform(df))
+
+    def inlier_scores(self, df):
+        anomaly = self._anomaly(df)
+        z = robust_z(anomaly, self.location, self.scale)
+        z[anomaly < self.location] = 0.0  # Easier to isolate than usual only
+        return robust_inlier_score(z)
+
+
+def detect_outliers_streaming(
+    chunks, train_sample, id_columns, outlier_threshold, seed=42, onehot_max_categories=ONEHOT_MAX_CATEGORIES
+):
+    """
+    Univariate and multivariate outliers of a dataset read as a stream of chunks.
+
+    Args:
+        chunks: callable returning a new iterator of DataFrame chunks, indexed
+            by row position in the dataset (called twice).
+        train_sample: callable receiving the columns to read and returning the
+            Isolation Forest training sample as a DataFrame.
+        id_columns: identifier columns, kept in outlier rows and never scored.
+        outlier_threshold: inlier score below which a value is an outlier.
+        seed: random seed of the Isolation Forest.
+        onehot_max_categories: categorical columns with more values are
+            frequency encoded (see FeatureEncoder).
+
+    Returns:
+        dict with ``rows``, ``columns`` (column -> (mean inlier score, outlier
+        rows with id columns)), ``normality`` (mean multivariate inlier score,
+        None when no column can be scored) and ``multivariate_outliers``.
+    """
+    profile = _ColumnProfile()
+    for chunk in chunks():
+        profile.update(chunk)
+
+    # Missing numeric values are filled with the column mean when scoring
+    means = profile.means()
+    kept = scorable_columns(list(profile.nulls), means, profile.nulls)
+    univariate_columns = [c for c in profile.numeric or [] if c in means and c not in id_columns]
+    scales = {c: robust_location_scale(*profile.sketches[c].weighted_values()) for c in univariate_columns}
+
+    model = None
+    feature_columns = [c for c in kept if c not in id_columns]
+    if feature_columns:
+        train_df = train_sample(kept)
+        if len(train_df):
+            model = _MultivariateModel(
+                train_df[feature_columns],
+                [c for c in feature_columns if c in means],
+                seed,
+                onehot_max_categories,
+                fill_values=means,
+            )
+
+    inlier_sums = dict.fromkeys(univariate_columns, 0.0)
+    outlier_parts = {c: [] for c in univariate_columns}
+    mv_inlier_sum = 0.0
+    mv_parts = []
+    for chunk in chunks():
+        for column in univariate_columns:
+            values = impute(chunk[column].to_numpy(dtype=np.float64, na_value=np.nan), means[column])
+            z = robust_z(values, *scales[column])
+            inlier = robust_inlier_score(z)
+            inlier_sums[column] += float(inlier.sum())
+            mask = inlier < outlier_threshold
+            if mask.any():
+                outlier_parts[column].append(chunk.loc[mask, id_columns + [column]])
+        if model is not None:
+            inlier = model.inlier_scores(chunk)
+            mv_inlier_sum += float(inlier.sum())
+            mask = inlier < outlier_threshold
+            if mask.any():
+                mv_parts.append(chunk.loc[mask, kept])
+
+    rows = max(profile.rows, 1)
+    columns = {
+        c: (
+            inlier_sums[c] / rows,
+            pd.concat(outlier_parts[c]) if outlier_parts[c] else pd.DataFrame(columns=id_columns + [c]),
+        )
+        for c in univariate_columns
+    }
+    return {
+        "rows": profile.rows,
+        "columns": columns,
+        "normality": mv_inlier_sum / rows if model is not None else None,
+        "multivariate_outliers": pd.concat(mv_parts) if mv_parts else pd.DataFrame(columns=kept),
+    }
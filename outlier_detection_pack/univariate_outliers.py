@@ -0,0 +1,111 @@
+"""
+Vectorized univariate outlier scoring.
+
+For a single column, the KNN anomaly score used by the pack (pyod ``KNN`` with
+the default ``method="largest"``) is the distance from each value to its k-th
+nearest training value. In one dimension the k nearest values of ``x`` are
+always among the k values left and the k values right of its insertion point
+in the sorted training array, so the score is computed with one sort, one
+``searchsorted`` and a merge of the 2k candidate distances instead of a
+KD-tree per column: O(n log n) per column.
+
+Columns are independent and numpy releases the GIL while sorting and
+partitioning, so columns are scored in parallel threads.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from preprocessing import impute
+
+KNN_N_NEIGHBORS = 5  # pyod KNN default
+MAX_SCORING_WORKERS = 32
+
+
+def knn_kth_distances(values, train_values=None, n_neighbors=KNN_N_NEIGHBORS):
+    """
+    Distance from each value to its ``n_neighbors``-th nearest training value.
+
+    Matches ``KNN(n_neighbors).fit(train).decision_function(values)`` for 1-D
+    data: when ``values`` are part of the training set, a value counts as its
+    own nearest neighbor (distance 0), as in pyod.
+
+    Args:
+        values: 1-D array of values to score.
+        train_values: 1-D training array (defaults to ``values``).
+        n_neighbors: number of neighbors (must be below the training size, as in pyod).
+
+    Returns:
+        numpy.ndarray of float64 scores, one per value.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    train = np.sort(np.asarray(values if train_values is None else train_values, dtype=np.float64))
+    if n_neighbors >= len(train):
+        raise ValueError(
+            f"Expected n_neighbors < n_samples_fit, but n_neighbors = {n_neighbors}, n_samples_fit = {len(train)}"
+        )
+
+    # Queries are processed in sorted order (cache-friendly searchsorted and gathers)
+    order = np.argsort(values, kind="stable")
+    queries = values[order]
+    insert_at = np.searchsorted(train, queries)
+    n_train = len(train)
+
+    # left[j] / right[j]: distance to the (j+1)-th training value on each side
+    left, right = [], []
+    for j in range(n_neighbors):
+        idx = insert_at - 1 - j
+        dist = queries - train[np.maximum(idx, 0)]
+        dist[idx < 0] = np.inf
+        left.append(dist)
+        idx = insert_at + j
+        dist = train[np.minimum(idx, n_train - 1)] - queries
+        dist[idx >= n_train] = np.inf
+        right.append(dist)
+
+    # k-th smallest of two ascending lists: best split of k between both sides
+    kth = np.minimum(left[n_neighbors - 1], right[n_neighbors - 1])
+    for i in range(1, n_neighbors):
+        kth = np.minimum(kth, np.maximum(left[i - 1], right[n_neighbors - i - 1]))
+
+    scores = np.empty_like(kth)
+    scores[order] = kth
+    return scores
+
+
+def score_univariate_columns(
+    df, columns, train_idx=None, n_neighbors=KNN_N_NEIGHBORS, max_workers=None, fill_values=None
+):
+    """
+    KNN anomaly scores of several numeric columns, computed in parallel.
+
+    Args:
+        df: DataFrame holding the columns.
+        columns: numeric columns to score.
+        train_idx: optional positional row indices of the training sample
+            (scores are always computed for every row).
+        n_neighbors: number of neighbors.
+        max_workers: number of threads (defaults to the CPU count).
+        fill_values: optional column -> value replacing missing values
+            (the frame itself is not modified).
+
+    Returns:
+        dict: column -> numpy array of scores aligned with ``df`` rows.
+    """
+    def _score(column):
+        values = df[column].to_numpy(dtype=np.float64, na_value=np.nan)
+        if fill_values and column in fill_values:
+            values = impute(values, fill_values[column])
+        train = values[train_idx] if train_idx is not None else None
+        return column, knn_kth_distances(values, train, n_neighbors)
+
+    columns = list(columns)
+    if not columns:
+        return {}
+    workers = max_workers or min(MAX_SCORING_WORKERS, os.cpu_count() or 1, len(columns))
+    if workers <= 1:
+        return dict(_score(column) for column in columns)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return dict(executor.map(_score, columns))
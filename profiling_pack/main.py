@@ -12,12 +12,22 @@ from qalita_core.aggregation import (
     normalize_and_dedupe_recommendations,
 )
 import json
-import pandas as pd
 import numpy as np
 import os
 from ydata_profiling import ProfileReport
+from streaming_profiler import profile_parquet_streaming, streaming_alerts
+from parquet_sampling import sampling_options
+from columnar_loader import (
+    count_parquet_rows,
+    is_parquet_path,
+    iter_parquet_batches,
+    load_parquet_with_sampling,
+    parquet_paths,
+    scan_parquet,
+)
 from datetime import datetime
-from io import StringIO
+import html
+import re
 import logging
 
 logger = logging.getLogger(__name__)
@@ -27,7 +37,21 @@ MAX_ROWS_FOR_FULL_PROFILE = 1_000_000  # Sample if more than 1M rows
 SAMPLE_SIZE_FOR_LARGE_DATASETS = 500_000  # Sample size for large datasets
 USE_MINIMAL_MODE_THRESHOLD = 5_000_000  # Use minimal mode if more than 5M rows
 
-# Try to import Polars for efficient row counting
+# Advanced statistics percentiles (metric key -> quantile)
+ADVANCED_PERCENTILES = {
+    "percentile_10": 0.10,
+    "percentile_25": 0.25,
+    "percentile_75": 0.75,
+    "percentile_90": 0.90,
+}
+
+# ydata-profiling alert templates, rendered one alert at a time (no full HTML report)
+try:
+    from ydata_profiling.report.presentation.flavours.html.templates import template as _alert_template
+except ImportError:
+    _alert_template = None
+
+# Try to import Polars for lazy advanced statistics
 try:
     import polars as pl
     POLARS_AVAILABLE = True
@@ -36,101 +60,100 @@ except ImportError:
     pl = None
 
 
-def _get_row_count_efficient(paths):
-    """Get row count efficiently without loading all data."""
-    if not paths:
-        return 0
-    
-    # Try Polars first (fastest)
-    if POLARS_AVAILABLE:
-        try:
-            lf = pl.scan_parquet(paths)
-            return lf.select(pl.len()).collect(engine="streaming").item()
-        except Exception:
-            pass
-    
-    # Fallback: read parquet metadata
+def _format_advanced_statistics(columns, counts, quantiles, population_variances):
+    """Assemble per-column advanced statistics from batched results (columns without values are skipped)."""
+    advanced = {}
+    for col, count, col_quantiles, population_variance in zip(columns, counts, quantiles, population_variances):
+        if not count:
+            continue
+        sample_variance = population_variance * count / (count - 1) if count > 1 else float("nan")
+        stats = dict(zip(ADVANCED_PERCENTILES, col_quantiles))
+        stats.update(
+            {
+                "sample_stddev": np.sqrt(sample_variance),
+                "population_stddev": np.sqrt(population_variance),
+                "sample_variance": sample_variance,
+                "population_variance": population_variance,
+            }
+        )
+        advanced[col] = stats
+    return advanced
+
+
+def _advanced_statistics(df):
+    """Percentiles, standard deviations and variances of every numeric column of a pandas DataFrame."""
+    numeric = df.select_dtypes(include=[np.number])
+    if numeric.empty:
+        return {}
+    quantiles = numeric.quantile(list(ADVANCED_PERCENTILES.values()))
+    return _format_advanced_statistics(
+        numeric.columns,
+        numeric.count().tolist(),
+        quantiles.T.to_numpy(dtype=float).tolist(),
+        numeric.var(ddof=0).tolist(),
+    )
+
+
+def _advanced_statistics_lazy(lf):
+    """Same statistics as _advanced_statistics, computed by Polars in a single query over a LazyFrame."""
+    schema = lf.collect_schema()
+    numeric_cols = [col for col, dtype in schema.items() if dtype.is_numeric()]
+    if not numeric_cols:
+        return {}
+    exprs = []
+    for i, col in enumerate(numeric_cols):
+        values = pl.col(col).cast(pl.Float64).fill_nan(None)
+        exprs.append(values.count().alias(f"{i}_count"))
+        exprs.append(values.var(ddof=0).alias(f"{i}_var"))
+        for j, q in enumerate(ADVANCED_PERCENTILES.values()):
+            exprs.append(values.quantile(q, interpolation="linear").alias(f"{i}_q{j}"))
     try:
-        import pyarrow.parquet as pq
-        total = 0
-        for path in paths:
-            if isinstance(path, str) and path.lower().endswith((".parquet", ".pq")):
-                pf = pq.ParquetFile(path)
-                total += pf.metadata.num_rows
-        return total
+        row = lf.select(exprs).collect(engine="streaming").row(0)
     except Exception:
-        return 0
+        row = lf.select(exprs).collect().row(0)
+    width = 2 + len(ADVANCED_PERCENTILES)
+    blocks = [row[i * width:(i + 1) * width] for i in range(len(numeric_cols))]
+    return _format_advanced_statistics(
+        numeric_cols,
+        [block[0] for block in blocks],
+        [[float("nan") if v is None else v for v in block[2:]] for block in blocks],
+        [float("nan") if block[1] is None else block[1] for block in blocks],
+    )
+
+
+def _advanced_statistics_from_states(states):
+    """Same statistics from streaming profile states (exact moments, sampled percentiles)."""
+    numeric_states = [state for state in states.values() if state.kind == "Numeric"]
+    return _format_advanced_statistics(
+        [state.name for state in numeric_states],
+        [state.n_finite for state in numeric_states],
+        [state.quantiles(list(ADVANCED_PERCENTILES.values())) for state in numeric_states],
+        [state.variance(ddof=0) for state in numeric_states],
+    )
 
 
-def _load_parquet_with_sampling(paths, max_rows=None, sample_fraction=None):
+def _alerts_from_description(description):
     """
-    Load parquet files with optional sampling for big data.
-    
-    For datasets larger than MAX_ROWS_FOR_FULL_PROFILE, automatically
-    samples to SAMPLE_SIZE_FOR_LARGE_DATASETS rows.
-    
+    Extract alerts from an in-memory ydata-profiling description.
+
+    Each alert is worded with its ydata-profiling template, so the content matches
+    what the HTML report shows without rendering or parsing the whole report.
+
     Returns:
-        tuple: (DataFrame, is_sampled, original_row_count)
+        list: ``(column, content, type)`` tuples.
     """
-    if not paths:
-        return pd.DataFrame(), False, 0
-    
-    # Ensure paths is a list
-    if isinstance(paths, str):
-        paths = [paths]
-    
-    # Filter to valid parquet paths
-    parquet_paths = [p for p in paths if isinstance(p, str) and p.lower().endswith((".parquet", ".pq"))]
-    if not parquet_paths:
-        return pd.DataFrame(), False, 0
-    
-    # Get total row count efficiently
-    total_rows = _get_row_count_efficient(parquet_paths)
-    
-    # Determine if sampling is needed
-    is_sampled = False
-    effective_max_rows = max_rows or MAX_ROWS_FOR_FULL_PROFILE
-    
-    if total_rows > effective_max_rows:
-        sample_size = min(SAMPLE_SIZE_FOR_LARGE_DATASETS, effective_max_rows)
-        logger.info(f"Large dataset detected ({total_rows:,} rows). Sampling {sample_size:,} rows for profiling.")
-        print(f"Large dataset detected ({total_rows:,} rows). Sampling {sample_size:,} rows for profiling.")
-        is_sampled = True
-        
-        # Use Polars for efficient sampling if available
-        if POLARS_AVAILABLE:
-            try:
-                lf = pl.scan_parquet(parquet_paths)
-                # Use head() for deterministic sampling (faster than random sample)
-                df = lf.head(sample_size).collect().to_pandas()
-                return df, is_sampled, total_rows
-            except Exception as e:
-                logger.warning(f"Polars sampling failed: {e}, falling back to pandas")
-        
-        # Pandas fallback: load only first chunk
+    alerts = []
+    for alert in getattr(description, "alerts", None) or []:
+        alert_name = alert.alert_type.name
+        if alert_name == "REJECTED":
+            continue
         try:
-            df = pd.read_parquet(parquet_paths[0], engine="pyarrow")
-            if len(df) > sample_size:
-                df = df.head(sample_size)
-            return df, is_sampled, total_rows
+            rendered = _alert_template(f"alerts/alert_{alert_name.lower()}.html").render(alert=alert)
+            content = html.unescape(re.sub(r"<[^>]+>", "", rendered)).strip()
         except Exception:
-            pass
-    
-    # Load full dataset (small enough)
-    try:
-        if POLARS_AVAILABLE:
-            lf = pl.scan_parquet(parquet_paths)
-            df = lf.collect().to_pandas()
-        else:
-            if len(parquet_paths) == 1:
-                df = pd.read_parquet(parquet_paths[0], engine="pyarrow")
-            else:
-                dfs = [pd.read_parquet(p, engine="pyarrow") for p in parquet_paths]
-                df = pd.concat(dfs, ignore_index=True)
-        return df, False, len(df)
-    except Exception as e:
-        logger.error(f"Failed to load parquet: {e}")
-        return pd.DataFrame(), False, 0
+            content = repr(alert)
+        alerts.append((alert.column_name, " ".join(content.split()), alert_name.replace("_", " ").capitalize()))
+    return alerts
 
 
 # --- Chargement des données ---
@@ -155,29 +178,51 @@ with Pack() as pack:
     configured_table_or_query = pack.source_config.get("config", {}).get("table_or_query")
     data_items = []
     
-    # Track sampling metadata
+    # Track sampling metadata (strategy, seed, sample size) per dataset
     sampling_metadata = {}
+    sampling = sampling_options(pack.pack_config.get("job", {}))
+
+    # Streaming profiles (full-data statistics) for datasets too large to profile in memory.
+    # "auto" streams only above MAX_ROWS_FOR_FULL_PROFILE, true always streams parquet inputs.
+    streaming_profile_mode = pack.pack_config.get("job", {}).get("streaming_profile", "auto")
+    streaming_reports = {}
+    dataset_parquet_paths = {}
+
+    # Report rendering is opt-in: headless scheduled runs only need the metrics
+    html_report_enabled = bool(pack.pack_config.get("job", {}).get("html_report", False))
+    json_report_enabled = bool(pack.pack_config.get("job", {}).get("json_report", False))
+
+    def _should_stream(row_count):
+        if streaming_profile_mode is True:
+            return True
+        if streaming_profile_mode == "auto":
+            return row_count > MAX_ROWS_FOR_FULL_PROFILE
+        return False
 
     # Si l'opener renvoie des chemins parquet, les charger avec sampling pour big data
     def _load_parquet_if_path(obj, dataset_name=None):
         """Load parquet with automatic sampling for large datasets."""
         try:
-            if isinstance(obj, str) and obj.lower().endswith((".parquet", ".pq")):
-                df, is_sampled, original_rows = _load_parquet_with_sampling([obj])
+            if is_parquet_path(obj):
+                df, is_sampled, original_rows, sampling_info = load_parquet_with_sampling(
+                    [obj], MAX_ROWS_FOR_FULL_PROFILE, SAMPLE_SIZE_FOR_LARGE_DATASETS, sampling=sampling
+                )
                 if dataset_name and is_sampled:
                     sampling_metadata[dataset_name] = {
                         "sampled": True,
                         "original_rows": original_rows,
-                        "sample_rows": len(df),
+                        **sampling_info,
                     }
                 return df
             elif isinstance(obj, list):
-                df, is_sampled, original_rows = _load_parquet_with_sampling(obj)
+                df, is_sampled, original_rows, sampling_info = load_parquet_with_sampling(
+                    obj, MAX_ROWS_FOR_FULL_PROFILE, SAMPLE_SIZE_FOR_LARGE_DATASETS, sampling=sampling
+                )
                 if dataset_name and is_sampled:
                     sampling_metadata[dataset_name] = {
                         "sampled": True,
                         "original_rows": original_rows,
-                        "sample_rows": len(df),
+                        **sampling_info,
                     }
                 return df
         except Exception as e:
@@ -186,17 +231,24 @@ with Pack() as pack:
 
     if isinstance(raw_df_source, list):
         # Check if this is a list of chunk paths that should be treated as one dataset
-        total_rows = _get_row_count_efficient(raw_df_source)
-        
-        # Load with sampling
-        df, is_sampled, original_rows = _load_parquet_with_sampling(raw_df_source)
-        if is_sampled:
-            sampling_metadata[dataset_scope_name] = {
-                "sampled": True,
-                "original_rows": original_rows,
-                "sample_rows": len(df),
-            }
-        
+        total_rows = count_parquet_rows(raw_df_source)
+
+        # Compute full-data statistics in one streaming pass before sampling for the report
+        parquet_sources = parquet_paths(raw_df_source)
+        streaming_report = None
+        if parquet_sources and _should_stream(total_rows):
+            print(f"Streaming profile over {total_rows:,} rows.")
+            streaming_report = profile_parquet_streaming(parquet_sources)
+
+        # Load with sampling (used for the ydata-profiling report, only rendered
+        # from the streaming profile when the HTML report is requested)
+        df, is_sampled = None, False
+        if streaming_report is None or html_report_enabled:
+            df, is_sampled, original_rows, sampling_info = load_parquet_with_sampling(
+                raw_df_source, MAX_ROWS_FOR_FULL_PROFILE, SAMPLE_SIZE_FOR_LARGE_DATASETS, sampling=sampling
+            )
+
+
         # Si la config fournit une liste de noms, l'utiliser si elle correspond en taille
         names = None
         if isinstance(configured_table_or_query, (list, tuple)):
@@ -208,11 +260,30 @@ with Pack() as pack:
             names = [dataset_scope_name]
             auto_named = True
         data_items = [(names[0], df)]
+        if is_sampled:
+            sampling_metadata[names[0]] = {
+                "sampled": True,
+                "original_rows": original_rows,
+                **sampling_info,
+            }
+        if parquet_sources:
+            dataset_parquet_paths[names[0]] = parquet_sources
+        if streaming_report is not None:
+            streaming_reports[names[0]] = streaming_report
     else:
         auto_named = False
         common_base_detected = False
-        df = _load_parquet_if_path(raw_df_source, dataset_scope_name)
+        if (
+            is_parquet_path(raw_df_source)
+            and _should_stream(count_parquet_rows(raw_df_source))
+        ):
+            streaming_reports[dataset_scope_name] = profile_parquet_streaming([raw_df_source])
+        df = None
+        if dataset_scope_name not in streaming_reports or html_report_enabled:
+            df = _load_parquet_if_path(raw_df_source, dataset_scope_name)
         data_items = [(dataset_scope_name, df)]
+        if is_parquet_path(raw_df_source):
+            dataset_parquet_paths[dataset_scope_name] = [raw_df_source]
 
     print(f"Generating profile for {len(data_items)} dataset(s)")
 
@@ -228,85 +299,122 @@ with Pack() as pack:
 
     # Accumulateur d'agrégation commun
     comp_agg = CompletenessAggregator()
+    # Column statistics of the aggregated dataset, added after the aggregator's metrics
+    aggregated_metrics = []
 
     for dataset_name, df in data_items:
-        # Sanitize the DataFrame before profiling/serialization to avoid downstream
-        # encoding/type issues with libraries expecting homogeneous column types.
-        try:
-            df = sanitize_dataframe_for_parquet(df)
-        except Exception:
-            pass
-        # Aperçu
-        try:
-            print(f"Preview for {dataset_name}:")
-            print(df.head())
-        except Exception:
-            pass
+        # Streaming profiles without HTML report never load the data (df is None)
+        if df is not None:
+            # Sanitize the DataFrame before profiling/serialization to avoid downstream
+            # encoding/type issues with libraries expecting homogeneous column types.
+            try:
+                df = sanitize_dataframe_for_parquet(df)
+            except Exception:
+                pass
+            # Aperçu
+            try:
+                print(f"Preview for {dataset_name}:")
+                print(df.head())
+            except Exception:
+                pass
 
         # Check if this dataset was sampled
         sample_info = sampling_metadata.get(dataset_name, {})
         is_sampled = sample_info.get("sampled", False)
-        original_rows = sample_info.get("original_rows", len(df))
+        original_rows = sample_info.get("original_rows", len(df) if df is not None else 0)
         
         # Build profile title with sampling info
         if is_sampled:
-            title = f"Profiling Report for {dataset_name} (Sampled: {len(df):,} of {original_rows:,} rows)"
-            print(f"Note: Dataset was sampled from {original_rows:,} to {len(df):,} rows for profiling.")
+            strategy = sample_info.get("strategy", "head")
+            title = f"Profiling Report for {dataset_name} (Sampled: {len(df):,} of {original_rows:,} rows, {strategy})"
+            print(f"Note: Dataset was sampled from {original_rows:,} to {len(df):,} rows for profiling ({strategy} sampling).")
         else:
             title = f"Profiling Report for {dataset_name}"
         
-        # Use minimal mode for very large samples to reduce memory usage
-        use_minimal = len(df) > USE_MINIMAL_MODE_THRESHOLD
-        
-        # Profiling pour ce dataset
-        profile = ProfileReport(
-            df,
-            title=title,
-            correlations={"auto": {"calculate": False}},
-            minimal=use_minimal,  # Use minimal mode for very large datasets
-        )
-        
-        if use_minimal:
-            print(f"Using minimal profiling mode for large dataset ({len(df):,} rows).")
-
-        # Sauvegarde HTML
-        html_file_name = f"{dataset_name}_report.html"
-        profile.to_file(html_file_name)
-
-        # Pour les sources fichier, on dépose aussi le rapport à côté du fichier source
-        if pack.source_config["type"] == "file" and len(data_items) == 1:
-            source_file_dir = os.path.dirname(pack.source_config["config"]["path"])
-            current_date = datetime.now().strftime("%Y%m%d")
-            report_file_path = os.path.join(
-                source_file_dir,
-                f'{current_date}_profiling_report_{pack.source_config["name"]}.html',
+        streaming_report = streaming_reports.get(dataset_name)
+
+        # In streaming mode ydata-profiling is only needed to render the HTML report
+        profile = None
+        if streaming_report is None or html_report_enabled:
+            # Use minimal mode for very large samples to reduce memory usage
+            use_minimal = len(df) > USE_MINIMAL_MODE_THRESHOLD
+
+            # Profiling pour ce dataset
+            profile = ProfileReport(
+                df,
+                title=title,
+                correlations={"auto": {"calculate": False}},
+                minimal=use_minimal,  # Use minimal mode for very large datasets
+                progress_bar=False,
             )
-            profile.to_file(report_file_path)
-            print(f"Profiling report saved to {report_file_path}")
 
-        # Sauvegarde JSON (structure exportée par ydata_profiling)
-        json_file_name = f"{dataset_name}_report.json"
-        profile.to_file(json_file_name)
+            if use_minimal:
+                print(f"Using minimal profiling mode for large dataset ({len(df):,} rows).")
+
+        # Sauvegarde HTML (opt-in)
+        if html_report_enabled:
+            html_file_name = f"{dataset_name}_report.html"
+            profile.to_file(html_file_name)
+
+            # Pour les sources fichier, on dépose aussi le rapport à côté du fichier source
+            if pack.source_config["type"] == "file" and len(data_items) == 1:
+                source_file_dir = os.path.dirname(pack.source_config["config"]["path"])
+                current_date = datetime.now().strftime("%Y%m%d")
+                report_file_path = os.path.join(
+                    source_file_dir,
+                    f'{current_date}_profiling_report_{pack.source_config["name"]}.html',
+                )
+                profile.to_file(report_file_path)
+                print(f"Profiling report saved to {report_file_path}")
 
-        # Extraire tableaux HTML pour les alertes (si présents)
-        try:
-            with open(html_file_name, "r", encoding="utf-8") as f:
-                html_content = f.read()
-                tables = pd.read_html(StringIO(html_content))
-        except ValueError as e:
-            print(f"No tables found in the HTML report for {dataset_name}: {e}")
-            tables = [pd.DataFrame()]
+        # Description du profil en mémoire (ydata_profiling, ou profil streaming sur données complètes)
+        if streaming_report is not None:
+            report = streaming_report
+            report_json = None
+        else:
+            report_json = profile.to_json()
+            report = json.loads(report_json)
+
+        # Sauvegarde JSON (opt-in)
+        if json_report_enabled:
+            json_file_name = f"{dataset_name}_report.json"
+            with open(json_file_name, "w", encoding="utf-8") as file:
+                if report_json is not None:
+                    file.write(report_json)
+                else:
+                    json.dump({"table": report["table"], "variables": report["variables"]}, file, default=str)
+
+        # Alertes depuis la description en mémoire (sans relire le rapport HTML)
+        if profile is not None:
+            alerts = _alerts_from_description(profile.get_description())
+        else:
+            alerts = streaming_alerts(streaming_report["variables"])
 
         ############################ Metrics (par dataset ou agrégé)
         # Accumuler pour agrégation globale si chunking détecté
+        if streaming_report is not None:
+            non_null_counts = {col: v["count"] for col, v in streaming_report["variables"].items()}
+            row_count = streaming_report["table"]["n"]
+        else:
+            non_null_counts = {col: int(df[col].notnull().sum()) for col in df.columns}
+            row_count = len(df)
+
         if treat_chunks_as_one:
-            comp_agg.add_df(df)
+            if streaming_report is not None:
+                # Completeness over every row, read from the parquet files
+                dataset_paths = dataset_parquet_paths[dataset_name]
+                if POLARS_AVAILABLE:
+                    comp_agg.add_lf(scan_parquet(dataset_paths))
+                else:
+                    for batch in iter_parquet_batches(dataset_paths):
+                        comp_agg.add_df(batch)
+            else:
+                comp_agg.add_df(df)
         else:
             # Scores de complétude par colonne (mode multi-datasets)
-            for col in df.columns:
-                non_null_count = max(df[col].notnull().sum(), 0)
-                total_count = max(len(df), 1)
-                completeness_score = round(non_null_count / total_count, 2)
+            for col, non_null_count in non_null_counts.items():
+                total_count = max(row_count, 1)
+                completeness_score = round(max(non_null_count, 0) / total_count, 2)
                 pack.metrics.data.append(
                     {
                         "key": "completeness_score",
@@ -323,10 +431,6 @@ with Pack() as pack:
                 )
 
         # Charger le JSON du rapport pour extraire les métriques globales et variables
-        print(f"Load {dataset_name}_report.json")
-        with open(json_file_name, "r", encoding="utf-8") as file:
-            report = json.load(file)
-
         general_data = denormalize(report["table"])
         if not treat_chunks_as_one:
             for key, value in general_data.items():
@@ -351,8 +455,11 @@ with Pack() as pack:
                     }
                 pack.metrics.data.append(entry)
 
-        # Variables détaillées: ne pas dupliquer si chunks; on les omet en mode agrégé
-        if not treat_chunks_as_one:
+        # Variables détaillées: en mode agrégé, seules celles du profil streaming
+        # (calculées sur toutes les lignes) sont gardées, au périmètre du dataset racine
+        if not treat_chunks_as_one or streaming_report is not None:
+            variables_scope = dataset_scope_name if treat_chunks_as_one else dataset_name
+            variables_metrics = aggregated_metrics if treat_chunks_as_one else pack.metrics.data
             variables_data = report["variables"]
             for variable_name, attributes in variables_data.items():
                 for attr_name, attr_value in attributes.items():
@@ -364,40 +471,39 @@ with Pack() as pack:
                             "value": variable_name,
                             "parent_scope": {
                                 "perimeter": "dataset",
-                                "value": dataset_name,
+                                "value": variables_scope,
                             },
                         },
                     }
-                    pack.metrics.data.append(entry)
+                    variables_metrics.append(entry)
 
         ############################  Advanced Statistics (percentiles, stddev, variance)
-        # Compute advanced statistics for numeric columns
-        numeric_cols = df.select_dtypes(include=[np.number]).columns
-        for col in numeric_cols:
-            col_data = df[col].dropna()
-            if len(col_data) > 0:
-                col_scope = {
-                    "perimeter": "column",
-                    "value": col,
-                    "parent_scope": {"perimeter": "dataset", "value": dataset_name},
-                }
-                # Percentiles (: percentile_10_in_range, percentile_25_in_range, etc.)
-                pack.metrics.data.extend([
-                    {"key": "percentile_10", "value": str(round(float(np.percentile(col_data, 10)), 4)), "scope": col_scope.copy()},
-                    {"key": "percentile_25", "value": str(round(float(np.percentile(col_data, 25)), 4)), "scope": col_scope.copy()},
-                    {"key": "percentile_75", "value": str(round(float(np.percentile(col_data, 75)), 4)), "scope": col_scope.copy()},
-                    {"key": "percentile_90", "value": str(round(float(np.percentile(col_data, 90)), 4)), "scope": col_scope.copy()},
-                ])
-                # Standard deviation (: sample_stddev_in_range, population_stddev_in_range)
-                pack.metrics.data.extend([
-                    {"key": "sample_stddev", "value": str(round(float(col_data.std(ddof=1)), 4)), "scope": col_scope.copy()},
-                    {"key": "population_stddev", "value": str(round(float(col_data.std(ddof=0)), 4)), "scope": col_scope.copy()},
-                ])
-                # Variance (: sample_variance_in_range, population_variance_in_range)
-                pack.metrics.data.extend([
-                    {"key": "sample_variance", "value": str(round(float(col_data.var(ddof=1)), 4)), "scope": col_scope.copy()},
-                    {"key": "population_variance", "value": str(round(float(col_data.var(ddof=0)), 4)), "scope": col_scope.copy()},
-                ])
+        # Computed for all numeric columns at once: one quantile pass and one moments pass
+        dataset_paths = dataset_parquet_paths.get(dataset_name)
+        if streaming_report is not None:
+            advanced_stats = _advanced_statistics_from_states(streaming_report["states"])
+        elif POLARS_AVAILABLE and dataset_paths and not is_sampled:
+            try:
+                advanced_stats = _advanced_statistics_lazy(scan_parquet(dataset_paths))
+            except Exception as e:
+                logger.warning(f"Polars advanced statistics failed: {e}, falling back to pandas")
+                advanced_stats = _advanced_statistics(df)
+        else:
+            advanced_stats = _advanced_statistics(df)
+
+        for col, stats in advanced_stats.items():
+            col_scope = {
+                "perimeter": "column",
+                "value": col,
+                "parent_scope": {
+                    "perimeter": "dataset",
+                    "value": dataset_scope_name if treat_chunks_as_one else dataset_name,
+                },
+            }
+            (aggregated_metrics if treat_chunks_as_one else pack.metrics.data).extend(
+                {"key": key, "value": str(round(float(value), 4)), "scope": col_scope.copy()}
+                for key, value in stats.items()
+            )
 
         # Score basé sur p_cells_missing (directement depuis general_data)
         if not treat_chunks_as_one:
@@ -432,22 +538,21 @@ with Pack() as pack:
                 )
 
         ############################ Recommendations (par dataset)
-        if len(tables) > 2:
-            alerts_data = tables[2]
-            alerts_data.columns = ["content", "type"]
-            alerts_data["scope"] = alerts_data["content"].apply(
-                lambda x: {
-                    "perimeter": "column",
-                    "value": extract_variable_name(x),
-                    "parent_scope": {"perimeter": "dataset", "value": dataset_name},
+        if not alerts:
+            print(f"No alerts found in the profile of {dataset_name}.")
+        for column, content, alert_type in alerts:
+            all_alerts_records.append(
+                {
+                    "content": content,
+                    "type": alert_type,
+                    "scope": {
+                        "perimeter": "column",
+                        "value": column or extract_variable_name(content),
+                        "parent_scope": {"perimeter": "dataset", "value": dataset_name},
+                    },
+                    "level": determine_level(content),
                 }
             )
-            alerts_data["level"] = alerts_data["content"].apply(determine_level)
-        else:
-            print(f"No alerts table found in the HTML report for {dataset_name}.")
-            alerts_data = pd.DataFrame()
-
-        all_alerts_records.extend(alerts_data.to_dict(orient="records"))
 
         ############################ Schemas (par dataset)
         if treat_chunks_as_one:
@@ -507,6 +612,7 @@ with Pack() as pack:
         pack.metrics.data, pack.schemas.data = comp_agg.finalize_metrics_and_schemas(
             dataset_scope_name
         )
+        pack.metrics.data.extend(aggregated_metrics)
 
 
 
@@ -0,0 +1,322 @@
+"""
+Streaming single-pass profiler for large parquet inputs.
+
+Computes the per-column statistics emitted by the profiling pack over every
+record batch of the parquet files, without ever holding more than one batch in
+memory. Each batch is reduced into mergeable per-column states:
+
+- counts, missing values, zeros, negatives and infinities are exact;
+- min / max / sum / mean / variance are exact (Chan's parallel update);
+- percentiles come from a uniform bottom-k priority sample, exact as long as
+  the column has at most ``QUANTILE_SAMPLE_SIZE`` non-null values;
+- distinct counts come from a K-Minimum-Values hash sketch, exact as long as
+  the column has at most ``DISTINCT_SKETCH_SIZE`` distinct values.
+
+The output mirrors the ``table`` / ``variables`` layout of the ydata-profiling
+JSON report so the pack can emit metrics the same way in both modes.
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+STREAMING_BATCH_ROWS = 250_000  # Rows per record batch read from parquet
+QUANTILE_SAMPLE_SIZE = 100_000  # Values kept per column for percentiles
+DISTINCT_SKETCH_SIZE = 65_536  # Hashes kept per column for n_distinct
+DEFAULT_SEED = 42
+ALERT_RATIO_THRESHOLD = 0.01  # Same trigger as ydata-profiling alerts
+HIGH_CARDINALITY_THRESHOLD = 50  # ydata-profiling default cardinality_threshold
+
+_HASH_SPACE = float(2**64)
+
+
+def _column_type(arrow_type):
+    """Map an Arrow type to the ydata-profiling variable type name."""
+    if pa.types.is_boolean(arrow_type):
+        return "Boolean"
+    if pa.types.is_integer(arrow_type) or pa.types.is_floating(arrow_type) or pa.types.is_decimal(arrow_type):
+        return "Numeric"
+    if pa.types.is_temporal(arrow_type):
+        return "DateTime"
+    return "Categorical"
+
+
+class ColumnProfileState:
+    """Mergeable streaming statistics for a single column."""
+
+    def __init__(self, name, kind):
+        self.name = name
+        self.kind = kind
+        self.n = 0
+        self.n_missing = 0
+        # Numeric moments (finite values only)
+        self.n_finite = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+        self.n_zeros = 0
+        self.n_negative = 0
+        self.n_infinite = 0
+        # Bottom-k priority sample (uniform sample of non-null values)
+        self.sample_keys = np.empty(0, dtype=np.float64)
+        self.sample_values = np.empty(0, dtype=np.float64)
+        # K-Minimum-Values distinct sketch (sorted unique uint64 hashes)
+        self.distinct_hashes = np.empty(0, dtype=np.uint64)
+        self.distinct_supported = True
+
+    @classmethod
+    def from_array(cls, name, kind, array, rng):
+        """Build the state of one chunk from an Arrow array."""
+        state = cls(name, kind)
+        state.n = len(array)
+        if kind == "Numeric":
+            values = array.cast(pa.float64()).to_numpy(zero_copy_only=False)
+            present = values[~np.isnan(values)]
+            state.n_missing = state.n - len(present)
+            infinite = np.isinf(present)
+            state.n_infinite = int(infinite.sum())
+            finite = present[~infinite]
+            state.n_finite = len(finite)
+            if state.n_finite:
+                state.sum = float(finite.sum())
+                state.mean = state.sum / state.n_finite
+                state.m2 = float(((finite - state.mean) ** 2).sum())
+                state.min = float(finite.min())
+                state.max = float(finite.max())
+                state.n_zeros = int((finite == 0).sum())
+                state.n_negative = int((finite < 0).sum())
+                state.sample_keys, state.sample_values = _bottom_k(
+                    rng.random(state.n_finite), finite, QUANTILE_SAMPLE_SIZE
+                )
+            state._add_distinct(pd.util.hash_array(present))
+        else:
+            state.n_missing = array.null_count
+            try:
+                present = array.drop_null().cast(pa.string()).to_numpy(zero_copy_only=False)
+                state._add_distinct(pd.util.hash_array(present.astype(object)))
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError, TypeError):
+                # Nested / binary types: distinct count is not tracked
+                state.distinct_supported = False
+        return state
+
+    @classmethod
+    def all_missing(cls, name, kind, rows):
+        """State for a chunk where the column is absent."""
+        state = cls(name, kind)
+        state.n = rows
+        state.n_missing = rows
+        return state
+
+    def _add_distinct(self, hashes):
+        merged = np.union1d(self.distinct_hashes, np.asarray(hashes, dtype=np.uint64))
+        self.distinct_hashes = merged[:DISTINCT_SKETCH_SIZE]
+
+    def merge(self, other):
+        """Merge the state of another chunk into this one."""
+        self.n += other.n
+        self.n_missing += other.n_missing
+        self.n_zeros += other.n_zeros
+        self.n_negative += other.n_negative
+        self.n_infinite += other.n_infinite
+        if other.n_finite:
+            if self.n_finite:
+                total = self.n_finite + other.n_finite
+                delta = other.mean - self.mean
+                self.m2 += other.m2 + delta * delta * self.n_finite * other.n_finite / total
+                self.mean += delta * other.n_finite / total
+                self.n_finite = total
+                self.min = min(self.min, other.min)
+                self.max = max(self.max, other.max)
+            else:
+                self.n_finite = other.n_finite
+                self.mean = other.mean
+                self.m2 = other.m2
+                self.min = other.min
+                self.max = other.max
+            self.sum += other.sum
+            self.sample_keys, self.sample_values = _bottom_k(
+                np.concatenate([self.sample_keys, other.sample_keys]),
+                np.concatenate([self.sample_values, other.sample_values]),
+                QUANTILE_SAMPLE_SIZE,
+            )
+        self.distinct_supported = self.distinct_supported and other.distinct_supported
+        self._add_distinct(other.distinct_hashes)
+        return self
+
+    @property
+    def count(self):
+        return self.n - self.n_missing
+
+    @property
+    def n_distinct(self):
+        """Exact below DISTINCT_SKETCH_SIZE distinct values, KMV estimate above."""
+        if not self.distinct_supported:
+            return None
+        k = len(self.distinct_hashes)
+        if k < DISTINCT_SKETCH_SIZE:
+            return k
+        kth = float(self.distinct_hashes[-1]) + 1.0
+        return int(min(round((k - 1) * _HASH_SPACE / kth), self.count))
+
+    @property
+    def distinct_is_exact(self):
+        return len(self.distinct_hashes) < DISTINCT_SKETCH_SIZE
+
+    def variance(self, ddof=1):
+        if self.n_finite - ddof <= 0:
+            return float("nan")
+        return self.m2 / (self.n_finite - ddof)
+
+    def quantiles(self, qs):
+        """Percentiles (0-1 scale) from the priority sample; NaN if no values."""
+        if not len(self.sample_values):
+            return [float("nan")] * len(qs)
+        return [float(v) for v in np.quantile(self.sample_values, qs)]
+
+    def to_variable(self):
+        """Render the state with ydata-profiling ``variables`` attribute names."""
+        n = max(self.n, 1)
+        count = self.count
+        n_distinct = self.n_distinct
+        variable = {
+            "type": self.kind,
+            "n": self.n,
+            "count": count,
+            "n_missing": self.n_missing,
+            "p_missing": self.n_missing / n,
+        }
+        if n_distinct is not None:
+            variable["n_distinct"] = n_distinct
+            variable["p_distinct"] = n_distinct / count if count else 0.0
+            variable["is_unique"] = bool(self.distinct_is_exact and count > 0 and n_distinct == count)
+        if self.kind == "Numeric" and self.n_finite:
+            p5, p25, p50, p75, p95 = self.quantiles([0.05, 0.25, 0.5, 0.75, 0.95])
+            std = float(np.sqrt(self.variance(ddof=1)))
+            variable.update(
+                {
+                    "mean": self.mean,
+                    "std": std,
+                    "variance": self.variance(ddof=1),
+                    "min": self.min,
+                    "max": self.max,
+                    "range": self.max - self.min,
+                    "sum": self.sum,
+                    "5%": p5,
+                    "25%": p25,
+                    "50%": p50,
+                    "75%": p75,
+                    "95%": p95,
+                    "iqr": p75 - p25,
+                    "cv": std / self.mean if self.mean else float("nan"),
+                    "n_zeros": self.n_zeros,
+                    "p_zeros": self.n_zeros / n,
+                    "n_negative": self.n_negative,
+                    "p_negative": self.n_negative / n,
+                    "n_infinite": self.n_infinite,
+                    "p_infinite": self.n_infinite / n,
+                }
+            )
+        return variable
+
+
+def _fmt_percent(value):
+    """Format a ratio the way ydata-profiling renders it in alerts."""
+    if round(value, 3) == 0 and value > 0:
+        return "< 0.1%"
+    if round(value, 3) == 1 and value < 1:
+        return "> 99.9%"
+    return f"{value*100:2.1f}%"
+
+
+def streaming_alerts(variables):
+    """
+    Derive ydata-profiling style alerts from streaming variables.
+
+    Returns:
+        list: ``(column, content, type)`` tuples worded like the ydata-profiling report.
+    """
+    alerts = []
+    for column, variable in variables.items():
+        if variable["p_missing"] > ALERT_RATIO_THRESHOLD:
+            alerts.append((column, f"{column} has {variable['n_missing']} ({_fmt_percent(variable['p_missing'])}) missing values", "Missing"))
+        if variable.get("is_unique"):
+            alerts.append((column, f"{column} has unique values", "Unique"))
+        if variable["type"] == "Categorical" and variable.get("n_distinct", 0) > HIGH_CARDINALITY_THRESHOLD:
+            alerts.append((column, f"{column} has a high cardinality: {variable['n_distinct']} distinct values", "High cardinality"))
+        if variable.get("p_zeros", 0) > ALERT_RATIO_THRESHOLD:
+            alerts.append((column, f"{column} has {variable['n_zeros']} ({_fmt_percent(variable['p_zeros'])}) zeros", "Zeros"))
+        if variable.get("p_infinite", 0) > ALERT_RATIO_THRESHOLD:
+            alerts.append((column, f"{column} has {variable['n_infinite']} ({_fmt_percent(variable['p_infinite'])}) infinite values", "Infinite"))
+    return alerts
+
+
+def _bottom_k(keys, values, k):
+    """Keep the k entries with the smallest random keys (uniform sample)."""
+    if len(keys) <= k:
+        return keys, values
+    keep = np.argpartition(keys, k - 1)[:k]
+    return keys[keep], values[keep]
+
+
+def _iter_batches(paths, batch_rows):
+    for path in paths:
+        parquet_file = pq.ParquetFile(path)
+        yield from parquet_file.iter_batches(batch_size=batch_rows)
+
+
+def profile_parquet_streaming(paths, batch_rows=STREAMING_BATCH_ROWS, seed=DEFAULT_SEED):
+    """
+    Profile parquet files in a single streaming pass.
+
+    Args:
+        paths: list of parquet file paths forming one dataset.
+        batch_rows: maximum rows held in memory at once.
+        seed: seed of the priority sample used for percentiles.
+
+    Returns:
+        dict: ``{"table": {...}, "variables": {...}, "states": {...}}`` where
+        ``table`` / ``variables`` follow the ydata-profiling JSON layout and
+        ``states`` maps column names to their ColumnProfileState.
+    """
+    if isinstance(paths, str):
+        paths = [paths]
+    rng = np.random.default_rng(seed)
+    schema = pq.read_schema(paths[0])
+    kinds = {field.name: _column_type(field.type) for field in schema}
+    states = {name: ColumnProfileState(name, kind) for name, kind in kinds.items()}
+    total_rows = 0
+    for batch in _iter_batches(paths, batch_rows):
+        rows = batch.num_rows
+        total_rows += rows
+        for name, kind in kinds.items():
+            index = batch.schema.get_field_index(name)
+            if index < 0:
+                chunk_state = ColumnProfileState.all_missing(name, kind, rows)
+            else:
+                chunk_state = ColumnProfileState.from_array(name, kind, batch.column(index), rng)
+            states[name].merge(chunk_state)
+
+    variables = {name: state.to_variable() for name, state in states.items()}
+    n_var = len(variables)
+    n_cells_missing = sum(state.n_missing for state in states.values())
+    types = {}
+    for variable in variables.values():
+        types[variable["type"]] = types.get(variable["type"], 0) + 1
+    table = {
+        "n": total_rows,
+        "n_var": n_var,
+        "n_cells_missing": n_cells_missing,
+        "n_vars_with_missing": sum(1 for state in states.values() if state.n_missing > 0),
+        "n_vars_all_missing": sum(1 for state in states.values() if total_rows and state.n_missing == total_rows),
+        "p_cells_missing": n_cells_missing / max(total_rows * n_var, 1),
+        "types": types,
+    }
+    logger.info(f"Streaming profile computed over {total_rows:,} rows and {n_var} columns")
+    return {"table": table, "variables": variables, "states": states}
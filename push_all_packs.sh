@@ -8,6 +8,7 @@ set -euo pipefail
 ROOT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 PACKS_DIR="$ROOT_DIR"
 SOURCE_RUN_SH="$PACKS_DIR/scripts/run.sh"
+SHARED_DIR="$PACKS_DIR/shared"
 
 if [[ ! -d "$PACKS_DIR" ]]; then
   echo "Packs directory not found at $PACKS_DIR" >&2
@@ -44,6 +45,10 @@ for prop in "${PROP_FILES[@]}"; do
   cp -f "$SOURCE_RUN_SH" "$pack_dir/run.sh"
   chmod +x "$pack_dir/run.sh"
 
+  # Shared Python modules are imported by main.py as top-level modules
+  echo "Syncing shared modules into $pack_dir..."
+  cp -f "$SHARED_DIR"/*.py "$pack_dir/"
+
   echo "Pushing pack '$pack_name' from $pack_dir..."
   qalita pack push -n $pack_name
 done
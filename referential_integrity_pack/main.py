@@ -1,5 +1,5 @@
 from qalita_core.pack import Pack
-import pandas as pd
+from columnar_loader import load_parquet, parquet_paths
 import logging
 
 logger = logging.getLogger(__name__)
@@ -108,8 +108,8 @@ with Pack() as pack:
         child_paths = child_raw if isinstance(child_raw, list) else [child_raw]
         
         # Filter to parquet paths
-        parent_parquet = [p for p in parent_paths if isinstance(p, str) and p.lower().endswith((".parquet", ".pq"))]
-        child_parquet = [p for p in child_paths if isinstance(p, str) and p.lower().endswith((".parquet", ".pq"))]
+        parent_parquet = parquet_paths(parent_paths)
+        child_parquet = parquet_paths(child_paths)
         
         # Try Polars anti-join first (most memory efficient)
         if POLARS_AVAILABLE and parent_parquet and child_parquet:
@@ -121,23 +121,15 @@ with Pack() as pack:
             except Exception as e:
                 logger.warning(f"Polars FK check failed: {e}, falling back to pandas")
                 # Fallback to pandas
-                parent_df = pd.read_parquet(parent_parquet[0], engine="pyarrow")
-                child_df = pd.read_parquet(child_parquet[0], engine="pyarrow")
+                parent_df = load_parquet(parent_parquet[0], columns=parent_key)
+                child_df = load_parquet(child_parquet[0], columns=child_key)
                 missing_count, child_count = _find_missing_fks_pandas(
                     parent_df, child_df, parent_key, child_key
                 )
         else:
-            # Pandas fallback
-            def _load_parquet_if_path(obj):
-                try:
-                    if isinstance(obj, str) and obj.lower().endswith((".parquet", ".pq")):
-                        return pd.read_parquet(obj, engine="pyarrow")
-                except Exception:
-                    pass
-                return obj
-            
-            parent_df = _load_parquet_if_path(parent_paths[0])
-            child_df = _load_parquet_if_path(child_paths[0])
+            # Pandas fallback: only the key columns are read
+            parent_df = load_parquet(parent_paths[0], columns=parent_key)
+            child_df = load_parquet(child_paths[0], columns=child_key)
             missing_count, child_count = _find_missing_fks_pandas(
                 parent_df, child_df, parent_key, child_key
             )
@@ -0,0 +1,258 @@
+"""
+Columnar loader for the parquet files produced by ``pack.load_data``.
+
+Shared by every pack (copied next to each pack's main.py when packs are
+published). It replaces the per-pack ``_load_parquet_if_path``,
+``_get_row_count_efficient`` and ``_load_parquet_with_sampling`` helpers and
+pushes the column subset a pack needs down to the parquet reader, so columns
+a pack never looks at are neither read from disk nor materialized.
+
+``columns`` arguments accept either a list of names or a callable receiving
+the ``pyarrow.Schema`` of the dataset and returning the names to read. Names
+missing from the file are ignored (packs report missing columns themselves),
+and ``None`` reads every column.
+"""
+
+import logging
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs as fs
+import pyarrow.parquet as pq
+
+from parquet_sampling import sample_parquet, sampling_options
+
+logger = logging.getLogger(__name__)
+
+PARQUET_EXTENSIONS = (".parquet", ".pq")
+STREAMING_BATCH_ROWS = 250_000  # Rows per DataFrame yielded by iter_parquet_batches
+
+# Polars is optional: it provides the lazy handle
+try:
+    import polars as pl
+    POLARS_AVAILABLE = True
+except ImportError:
+    POLARS_AVAILABLE = False
+    pl = None
+
+_memory_pool = None  # see _arrow_memory_pool
+
+
+def is_parquet_path(obj):
+    return isinstance(obj, str) and obj.lower().endswith(PARQUET_EXTENSIONS)
+
+
+def parquet_paths(obj):
+    """Parquet paths contained in a path or a list of paths (other items are ignored)."""
+    items = obj if isinstance(obj, (list, tuple)) else [obj]
+    return [p for p in items if is_parquet_path(p)]
+
+
+def parquet_schema(paths):
+    """Arrow schema of a dataset, read from the footer of its first file."""
+    paths = parquet_paths(paths)
+    return pq.read_schema(paths[0]) if paths else None
+
+
+def numeric_columns(schema):
+    """Column selector for packs that only look at numeric columns (integer, float and boolean)."""
+    return [
+        field.name
+        for field in schema
+        if pa.types.is_integer(field.type) or pa.types.is_floating(field.type) or pa.types.is_boolean(field.type)
+    ]
+
+
+def count_parquet_rows(paths):
+    """Row count of parquet files from their footers, without reading any data page."""
+    total = 0
+    for path in parquet_paths(paths):
+        try:
+            total += pq.ParquetFile(path).metadata.num_rows
+        except Exception as e:
+            logger.warning(f"Could not read parquet metadata of {path}: {e}")
+    return total
+
+
+def resolve_columns(paths, columns):
+    """Names of ``columns`` present in the dataset, in request order (None means all columns)."""
+    if columns is None:
+        return None
+    schema = parquet_schema(paths)
+    if schema is None:
+        return None
+    if callable(columns):
+        columns = columns(schema)
+    available = set(schema.names)
+    resolved = []
+    for column in columns:
+        if column in available and column not in resolved:
+            resolved.append(column)
+    return resolved
+
+
+def _arrow_memory_pool():
+    """
+    Memory pool for full loads: jemalloc with immediate page release when available.
+
+    The default pool keeps freed pages around, so Arrow buffers released while a
+    table is converted to pandas would still count in the process RSS.
+    """
+    global _memory_pool
+    if _memory_pool is None:
+        try:
+            _memory_pool = pa.jemalloc_memory_pool()
+            pa.jemalloc_set_decay_ms(0)
+        except NotImplementedError:
+            _memory_pool = pa.default_memory_pool()
+    return _memory_pool
+
+
+def read_parquet_table(paths, columns=None):
+    """
+    Memory-mapped Arrow table over parquet files.
+
+    Every file is opened through a memory-mapped dataset and becomes one or
+    more chunks of the returned table: chunks are never concatenated, so no
+    second copy of the data is built. Schemas of the files are unified (e.g.
+    int64 and double columns become double) and files are scanned one at a
+    time to bound read-ahead buffers.
+    """
+    paths = parquet_paths(paths)
+    columns = resolve_columns(paths, columns)
+    schema = pa.unify_schemas(
+        [pq.read_schema(path, memory_map=True) for path in paths], promote_options="permissive"
+    )
+    dataset = ds.dataset(
+        paths, schema=schema, format="parquet", filesystem=fs.LocalFileSystem(use_mmap=True)
+    )
+    return dataset.to_table(columns=columns, fragment_readahead=1, memory_pool=_arrow_memory_pool())
+
+
+def table_to_pandas(table, arrow_dtypes=False):
+    """
+    Convert an Arrow table to pandas while keeping peak memory near one copy.
+
+    With ``arrow_dtypes`` the columns are ``pd.ArrowDtype`` views over the Arrow
+    buffers (zero copy). Otherwise each column is converted to its own block and
+    its Arrow buffers are released as soon as it is converted, so the table must
+    not be used afterwards.
+    """
+    if arrow_dtypes:
+        return table.to_pandas(types_mapper=pd.ArrowDtype)
+    return table.to_pandas(split_blocks=True, self_destruct=True, memory_pool=_arrow_memory_pool())
+
+
+def _read_parquet(paths, columns, arrow_dtypes):
+    """Read parquet files into one DataFrame; ``columns`` is already resolved."""
+    df = table_to_pandas(read_parquet_table(paths, columns), arrow_dtypes=arrow_dtypes)
+    if len(paths) > 1:
+        # Chunks form one dataset: renumber rows like pd.concat(ignore_index=True)
+        df.index = pd.RangeIndex(len(df))
+    return df
+
+
+def load_parquet(obj, columns=None, arrow_dtypes=False):
+    """
+    Load a parquet path (or a list of paths forming one dataset) as a DataFrame.
+
+    Args:
+        obj: parquet path, list of parquet paths, or any other object.
+        columns: column subset to read (list or callable on the Arrow schema).
+        arrow_dtypes: return ``pd.ArrowDtype`` columns backed by the Arrow
+            buffers instead of numpy columns.
+
+    Returns:
+        DataFrame, or ``obj`` unchanged when it is not a parquet path or cannot
+        be read.
+    """
+    paths = parquet_paths(obj)
+    if not paths:
+        return obj
+    try:
+        return _read_parquet(paths, resolve_columns(paths, columns), arrow_dtypes)
+    except Exception as e:
+        logger.warning(f"Failed to load parquet {paths[0]}: {e}")
+        return obj
+
+
+def scan_parquet(paths, columns=None):
+    """
+    Lazy Polars handle over parquet files with the column projection applied.
+
+    Raises:
+        ImportError: when Polars is not installed.
+    """
+    if not POLARS_AVAILABLE:
+        raise ImportError("Polars required for lazy parquet scans")
+    paths = parquet_paths(paths)
+    lf = pl.scan_parquet(paths)
+    resolved = resolve_columns(paths, columns)
+    return lf.select(resolved) if resolved is not None else lf
+
+
+def iter_parquet_batches(paths, columns=None, batch_rows=STREAMING_BATCH_ROWS):
+    """
+    Stream parquet files as DataFrames of at most ``batch_rows`` rows.
+
+    Row groups are read one after the other, so only one batch is held in
+    memory. Rows keep their position in the dataset as index (files are
+    numbered one after the other), as with ``load_parquet``.
+    """
+    paths = parquet_paths(paths)
+    columns = resolve_columns(paths, columns)
+    offset = 0
+    for path in paths:
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_rows, columns=columns):
+            df = batch.to_pandas()
+            df.index = pd.RangeIndex(offset, offset + len(df))
+            offset += len(df)
+            yield df
+
+
+def load_parquet_with_sampling(paths, max_rows, sample_size, sampling=None, columns=None):
+    """
+    Load parquet files, sampling ``sample_size`` rows when they hold more than ``max_rows``.
+
+    Args:
+        paths: parquet path or list of paths forming one dataset.
+        max_rows: row count above which the dataset is sampled.
+        sample_size: number of rows to sample.
+        sampling: keyword arguments of ``sample_parquet`` (see ``sampling_options``).
+        columns: column subset to read (list or callable on the Arrow schema).
+
+    Returns:
+        tuple: (DataFrame, is_sampled, original_row_count, sampling_info)
+    """
+    paths = parquet_paths(paths or [])
+    if not paths:
+        return pd.DataFrame(), False, 0, {}
+
+    columns = resolve_columns(paths, columns)
+    total_rows = count_parquet_rows(paths)
+
+    if total_rows > max_rows:
+        sample_size = min(sample_size, max_rows)
+        logger.info(f"Large dataset ({total_rows:,} rows). Sampling {sample_size:,} rows.")
+        print(f"Large dataset ({total_rows:,} rows). Sampling {sample_size:,} rows.")
+        sampling = sampling or sampling_options({})
+        try:
+            df, sampling_info = sample_parquet(paths, sample_size, columns=columns, **sampling)
+            print(f"Sampling strategy: {sampling_info['strategy']}")
+            return df, True, total_rows, sampling_info
+        except Exception as e:
+            logger.warning(f"Sampling with strategy '{sampling['strategy']}' failed: {e}, falling back to head()")
+
+        try:
+            df, sampling_info = sample_parquet(paths, sample_size, strategy="head", columns=columns)
+            return df, True, total_rows, sampling_info
+        except Exception as e:
+            logger.warning(f"Head sampling failed: {e}")
+
+    try:
+        df = _read_parquet(paths, columns, arrow_dtypes=False)
+        return df, False, len(df), {}
+    except Exception as e:
+        logger.error(f"Failed to load parquet: {e}")
+        return pd.DataFrame(), False, 0, {}
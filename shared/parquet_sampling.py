@@ -0,0 +1,249 @@
+"""
+Sampling engine for large parquet inputs.
+
+Shared by the packs that cannot process a full dataset in memory. The module
+is copied next to each pack's main.py when packs are published (see
+push_all_packs.sh and the publish workflow), so it must only depend on the
+libraries every pack already installs (pandas, numpy, pyarrow).
+
+Strategies:
+
+- ``head``: first rows of the dataset (legacy behaviour, oldest rows only).
+- ``row_groups``: uniform random selection of parquet row groups using the
+  file metadata; only the selected row groups are read from disk.
+- ``reservoir``: uniform random sample of rows streamed across every file,
+  holding at most the sample plus one record batch in memory.
+- ``stratified``: proportional random sample per value of a key column, with
+  at least one row for every non-empty stratum.
+
+All random strategies are driven by a seeded generator so that two runs on the
+same files return the same sample.
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+SAMPLING_STRATEGIES = ("head", "row_groups", "reservoir", "stratified")
+DEFAULT_SAMPLING_STRATEGY = "row_groups"
+DEFAULT_SAMPLING_SEED = 42
+SAMPLING_BATCH_ROWS = 250_000  # Rows per record batch when streaming
+
+_PRIORITY = "__sampling_priority"
+_POSITION = "__sampling_position"
+_STRATUM = "__sampling_stratum"
+
+
+def _as_path_list(paths):
+    if isinstance(paths, str):
+        paths = [paths]
+    return [p for p in paths if isinstance(p, str) and p.lower().endswith((".parquet", ".pq"))]
+
+
+def _iter_batches(paths, columns=None, batch_rows=SAMPLING_BATCH_ROWS):
+    for path in paths:
+        yield from pq.ParquetFile(path).iter_batches(batch_size=batch_rows, columns=columns)
+
+
+def _stratum_labels(values):
+    """String labels for a key column, with missing values grouped together."""
+    return pd.Series(values).astype(object).where(pd.notna(values), "<null>").astype(str).to_numpy()
+
+
+def _sample_head(paths, sample_size, columns):
+    frames = []
+    remaining = sample_size
+    for batch in _iter_batches(paths, columns):
+        frames.append(batch.slice(0, remaining).to_pandas())
+        remaining -= min(batch.num_rows, remaining)
+        if remaining == 0:
+            break
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns), {}
+
+
+def _sample_row_groups(paths, sample_size, rng, columns):
+    row_groups = []
+    for path in paths:
+        metadata = pq.ParquetFile(path).metadata
+        row_groups.extend((path, i, metadata.row_group(i).num_rows) for i in range(metadata.num_row_groups))
+
+    selected = []
+    selected_rows = 0
+    for index in rng.permutation(len(row_groups)):
+        if selected_rows >= sample_size:
+            break
+        selected.append(row_groups[index])
+        selected_rows += row_groups[index][2]
+
+    # Read the selected row groups file by file, in storage order
+    frames = []
+    for path in paths:
+        indices = sorted(i for p, i, _ in selected if p == path)
+        if indices:
+            frames.append(pq.ParquetFile(path).read_row_groups(indices, columns=columns).to_pandas())
+    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+
+    # Row groups rarely add up to the exact sample size: trim uniformly
+    if len(df) > sample_size:
+        keep = np.sort(rng.choice(len(df), size=sample_size, replace=False))
+        df = df.iloc[keep].reset_index(drop=True)
+    return df, {"row_groups_read": len(selected), "row_groups_total": len(row_groups)}
+
+
+def _stratum_quotas(paths, sample_size, stratify_column, rng):
+    """
+    Proportional allocation of the sample across the values of the key column.
+
+    Every stratum gets one row first when there are no more strata than
+    ``sample_size``; the rest is shared in proportion to the stratum sizes by
+    largest remainder (ties broken at random), so quotas add up to
+    ``sample_size`` (or every row of smaller datasets).
+    """
+    counts = pd.Series(dtype="int64")
+    for batch in _iter_batches(paths, [stratify_column]):
+        batch_counts = pd.Series(_stratum_labels(batch.column(0).to_pandas())).value_counts()
+        counts = counts.add(batch_counts, fill_value=0)
+    total = int(counts.sum())
+    sample_size = min(sample_size, total)
+    base = np.ones(len(counts)) if len(counts) <= sample_size else np.zeros(len(counts))
+    rest = counts.to_numpy() - base
+    shares = rest * (sample_size - base.sum()) / max(rest.sum(), 1)
+    quotas = base + np.floor(shares)
+    leftover = int(round(sample_size - quotas.sum()))
+    if leftover > 0:
+        order = np.lexsort((rng.random(len(counts)), -(shares - np.floor(shares))))
+        quotas[order[:leftover]] += 1
+    quotas = np.minimum(quotas, counts.to_numpy()).astype("int64")
+    return dict(zip(counts.index, quotas.tolist()))
+
+
+def _sample_streaming(paths, sample_size, rng, columns, stratify_column=None):
+    """
+    Bottom-k priority sampling over every record batch.
+
+    Each row gets a uniform random priority and the rows with the smallest
+    priorities are kept (per stratum when stratified), which is a uniform sample
+    without replacement. Rows whose priority cannot enter the current sample are
+    dropped before the batch is converted to pandas.
+    """
+    quotas = _stratum_quotas(paths, sample_size, stratify_column, rng) if stratify_column else None
+    read_columns = columns
+    if stratify_column and columns is not None and stratify_column not in columns:
+        read_columns = list(columns) + [stratify_column]
+
+    kept = None
+    # Strata without quota (more strata than sample rows) are skipped when read
+    empty_strata = {stratum: 0.0 for stratum, quota in quotas.items() if quota == 0} if quotas else {}
+    thresholds = dict(empty_strata)
+    position = 0
+    for batch in _iter_batches(paths, read_columns):
+        priorities = rng.random(batch.num_rows)
+        positions = np.arange(position, position + batch.num_rows)
+        position += batch.num_rows
+        if quotas is not None:
+            strata = _stratum_labels(batch.column(batch.schema.get_field_index(stratify_column)).to_pandas())
+            limits = pd.Series(strata).map(thresholds).fillna(np.inf).to_numpy() if thresholds else np.inf
+        else:
+            strata = None
+            limits = thresholds.get(None, np.inf)
+        mask = priorities < limits
+        if not mask.any():
+            continue
+        frame = batch.filter(mask).to_pandas()
+        frame[_PRIORITY] = priorities[mask]
+        frame[_POSITION] = positions[mask]
+        if strata is not None:
+            frame[_STRATUM] = strata[mask]
+        kept = frame if kept is None else pd.concat([kept, frame], ignore_index=True)
+
+        if quotas is None:
+            if len(kept) >= sample_size:
+                kept = kept.nsmallest(sample_size, _PRIORITY)
+                thresholds[None] = kept[_PRIORITY].max()
+        else:
+            rank = kept.groupby(_STRATUM)[_PRIORITY].rank(method="first")
+            kept = kept[rank <= kept[_STRATUM].map(quotas).fillna(0)]
+            sizes = kept.groupby(_STRATUM)[_PRIORITY].agg(["size", "max"])
+            thresholds = {
+                stratum: row["max"]
+                for stratum, row in sizes.iterrows()
+                if row["size"] >= quotas.get(stratum, 0)
+            }
+            thresholds.update(empty_strata)
+
+    if kept is None:
+        return pd.DataFrame(columns=columns), {}
+    kept = kept.sort_values(_POSITION)
+    drop = [c for c in (_PRIORITY, _POSITION, _STRATUM) if c in kept.columns]
+    if read_columns is not columns:
+        drop.append(stratify_column)
+    info = {"strata": len(quotas)} if quotas is not None else {}
+    return kept.drop(columns=drop).reset_index(drop=True), info
+
+
+def sample_parquet(
+    paths,
+    sample_size,
+    strategy=DEFAULT_SAMPLING_STRATEGY,
+    seed=DEFAULT_SAMPLING_SEED,
+    stratify_column=None,
+    columns=None,
+):
+    """
+    Draw a sample of at most ``sample_size`` rows from parquet files.
+
+    Args:
+        paths: parquet path or list of paths forming one dataset.
+        sample_size: maximum number of rows to return.
+        strategy: one of SAMPLING_STRATEGIES.
+        seed: seed of the random generator (reproducible samples).
+        stratify_column: key column, required by the ``stratified`` strategy.
+        columns: optional column subset to read.
+
+    Returns:
+        tuple: (DataFrame, sampling_info) where sampling_info records the
+        strategy, seed and sample size actually used.
+    """
+    paths = _as_path_list(paths)
+    if strategy not in SAMPLING_STRATEGIES:
+        logger.warning(f"Unknown sampling strategy '{strategy}', using '{DEFAULT_SAMPLING_STRATEGY}'")
+        strategy = DEFAULT_SAMPLING_STRATEGY
+    if strategy == "stratified":
+        schema_names = pq.read_schema(paths[0]).names if paths else []
+        if not stratify_column or stratify_column not in schema_names:
+            logger.warning(
+                f"Stratified sampling needs an existing 'sampling_stratify_column' (got {stratify_column!r}), using 'reservoir'"
+            )
+            strategy = "reservoir"
+
+    rng = np.random.default_rng(seed)
+    if strategy == "head":
+        df, details = _sample_head(paths, sample_size, columns)
+    elif strategy == "row_groups":
+        df, details = _sample_row_groups(paths, sample_size, rng, columns)
+    elif strategy == "reservoir":
+        df, details = _sample_streaming(paths, sample_size, rng, columns)
+    else:
+        df, details = _sample_streaming(paths, sample_size, rng, columns, stratify_column)
+
+    info = {"strategy": strategy, "sample_rows": len(df)}
+    if strategy != "head":
+        info["seed"] = seed
+    if strategy == "stratified":
+        info["stratify_column"] = stratify_column
+    info.update(details)
+    return df, info
+
+
+def sampling_options(job_config, default_strategy=DEFAULT_SAMPLING_STRATEGY):
+    """Read the sampling keys of a pack's ``job`` configuration as sample_parquet keyword arguments."""
+    job_config = job_config or {}
+    return {
+        "strategy": job_config.get("sampling_strategy") or default_strategy,
+        "seed": job_config.get("sampling_seed", DEFAULT_SAMPLING_SEED),
+        "stratify_column": job_config.get("sampling_stratify_column"),
+    }
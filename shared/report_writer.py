@@ -0,0 +1,193 @@
+"""
+Report writer for the row-level reports of the packs (duplicates, outliers).
+
+Shared by every pack (copied next to each pack's main.py when packs are
+published). A report is a set of named sheets. Depending on
+``job.report_format``:
+
+- ``excel`` (default): every sheet goes to one Excel workbook, up to the
+  1,048,575 data rows a worksheet can hold.
+- ``parquet`` / ``csv``: every sheet is streamed in full to its own file next
+  to the workbook (``<report>_<sheet>.parquet`` / ``.csv``), one row-group
+  batch at a time, and the workbook only keeps the first
+  ``job.report_excel_rows`` rows of each sheet as a summary.
+
+Sheets may be written in several calls (batches of the same columns), or
+from a Polars lazy frame sunk straight to the sheet's file (``sink``), so a
+report never has to be held in memory as a whole.
+"""
+
+import logging
+import os
+import re
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+try:
+    import polars as pl
+except ImportError:
+    pl = None  # Only needed by ReportWriter.sink, which receives Polars frames
+
+logger = logging.getLogger(__name__)
+
+REPORT_FORMATS = ("excel", "parquet", "csv")
+EXCEL_MAX_ROWS = 1_048_575  # Worksheet rows below the header
+DEFAULT_EXCEL_SUMMARY_ROWS = 10_000
+REPORT_BATCH_ROWS = 100_000  # Rows per parquet row group / CSV append
+
+
+def report_options(job_config):
+    """Report settings read from the pack's ``job`` configuration."""
+    report_format = job_config.get("report_format", "excel")
+    if report_format not in REPORT_FORMATS:
+        raise ValueError(f"Unknown report_format '{report_format}', expected one of {REPORT_FORMATS}")
+    return {
+        "report_format": report_format,
+        "excel_rows": job_config.get("report_excel_rows", DEFAULT_EXCEL_SUMMARY_ROWS),
+    }
+
+
+def _arrow_table(df, schema=None):
+    """Arrow table of a batch; object columns Arrow cannot type (mixed values) become strings."""
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        mixed = {c: "string" for c in df.columns if df[c].dtype == object}
+        table = pa.Table.from_pandas(df.astype(mixed), preserve_index=False)
+    if schema is not None and not table.schema.equals(schema):
+        table = table.cast(schema)
+    return table
+
+
+class ReportWriter:
+    """
+    Writer of one report (context manager).
+
+    Args:
+        path: path of the Excel workbook (``.xlsx``); parquet and CSV files
+            are written next to it.
+        report_format: one of REPORT_FORMATS.
+        excel_rows: rows of each sheet kept in the workbook for the parquet
+            and CSV formats (the Excel format keeps every row that fits).
+        batch_rows: rows per parquet row group / CSV append.
+        excel_engine: engine of ``pandas.ExcelWriter`` (pandas default when None).
+    """
+
+    def __init__(
+        self,
+        path,
+        report_format="excel",
+        excel_rows=DEFAULT_EXCEL_SUMMARY_ROWS,
+        batch_rows=REPORT_BATCH_ROWS,
+        excel_engine=None,
+    ):
+        if report_format not in REPORT_FORMATS:
+            raise ValueError(f"Unknown report_format '{report_format}', expected one of {REPORT_FORMATS}")
+        self.path = path
+        self.report_format = report_format
+        self.excel_rows = EXCEL_MAX_ROWS if report_format == "excel" else min(excel_rows, EXCEL_MAX_ROWS)
+        self.batch_rows = batch_rows
+        self.excel_engine = excel_engine
+        self.files = {}  # sheet -> parquet / CSV path
+        self._excel_parts = {}  # sheet -> frames kept for the workbook
+        self._excel_counts = {}
+        self._total_rows = {}
+        self._parquet_writers = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def _file_path(self, sheet):
+        stem = os.path.splitext(self.path)[0]
+        slug = re.sub(r"[^0-9A-Za-z]+", "_", sheet).strip("_").lower()
+        return f"{stem}_{slug}.{self.report_format}"
+
+    def write(self, sheet, df):
+        """Append the rows of ``df`` to ``sheet`` (the first call defines the columns)."""
+        if sheet not in self._excel_parts:
+            self._excel_parts[sheet] = []
+            self._excel_counts[sheet] = 0
+            self._total_rows[sheet] = 0
+        self._total_rows[sheet] += len(df)
+
+        kept = self._excel_counts[sheet]
+        if kept < self.excel_rows or not self._excel_parts[sheet]:
+            part = df.head(self.excel_rows - kept)
+            self._excel_parts[sheet].append(part)
+            self._excel_counts[sheet] += len(part)
+
+        if self.report_format == "excel":
+            return
+        for start in range(0, max(len(df), 1), self.batch_rows):
+            self._write_file_batch(sheet, df.iloc[start:start + self.batch_rows])
+
+    def sink(self, sheet, lf):
+        """
+        Write the rows of a Polars lazy frame to a new ``sheet`` without collecting them.
+
+        With the parquet and CSV formats the plan is streamed to the sheet's
+        file (``sink_parquet`` / ``sink_csv``) and only the workbook summary is
+        collected; the Excel format collects the rows a worksheet can hold.
+        The sheet cannot be appended to afterwards.
+        """
+        if sheet in self._excel_parts:
+            raise ValueError(f"Sheet '{sheet}' is already written")
+        if self.report_format == "excel":
+            total_rows = lf.select(pl.len()).collect().item()
+        else:
+            path = self.files[sheet] = self._file_path(sheet)
+            if self.report_format == "parquet":
+                lf.sink_parquet(path, row_group_size=self.batch_rows)
+                total_rows = pq.ParquetFile(path).metadata.num_rows
+            else:
+                lf.sink_csv(path)
+                total_rows = pl.scan_csv(path).select(pl.len()).collect().item()
+        summary = lf.head(self.excel_rows).collect().to_pandas()
+        self._excel_parts[sheet] = [summary]
+        self._excel_counts[sheet] = len(summary)
+        self._total_rows[sheet] = total_rows
+
+    def _write_file_batch(self, sheet, batch):
+        if sheet not in self.files:
+            self.files[sheet] = self._file_path(sheet)
+            if self.report_format == "csv":
+                batch.to_csv(self.files[sheet], index=False)
+                return
+        elif self.report_format == "csv":
+            batch.to_csv(self.files[sheet], mode="a", header=False, index=False)
+            return
+        writer = self._parquet_writers.get(sheet)
+        table = _arrow_table(batch, writer.schema if writer is not None else None)
+        if writer is None:
+            writer = self._parquet_writers[sheet] = pq.ParquetWriter(self.files[sheet], table.schema)
+        writer.write_table(table, row_group_size=self.batch_rows)
+
+    def close(self):
+        """Close the data files and write the workbook."""
+        for writer in self._parquet_writers.values():
+            writer.close()
+        self._parquet_writers = {}
+        if not self._excel_parts:
+            return
+        with pd.ExcelWriter(self.path, engine=self.excel_engine) as writer:
+            for sheet, parts in self._excel_parts.items():
+                pd.concat(parts, ignore_index=True).to_excel(writer, sheet_name=sheet, index=False)
+                if self._total_rows[sheet] > self._excel_counts[sheet]:
+                    if self.report_format == "excel":
+                        logger.warning(
+                            f"Sheet '{sheet}' truncated to {self._excel_counts[sheet]:,} of "
+                            f"{self._total_rows[sheet]:,} rows (Excel limit); set report_format to "
+                            f"'parquet' or 'csv' to keep every row"
+                        )
+                    else:
+                        print(
+                            f"Sheet '{sheet}' summarizes {self._excel_counts[sheet]:,} of "
+                            f"{self._total_rows[sheet]:,} rows, all in {self.files[sheet]}"
+                        )
+        self._excel_parts = {}
@@ -0,0 +1,56 @@
+"""
+Columnar encoding of the table metrics of the packs (``mismatches_table``,
+``outliers_table``).
+
+Shared by every pack (copied next to each pack's main.py when packs are
+published). A table metric used to be a list of rows of ``{"value": ...}``
+cells, one Python dict per cell. It is now one list of values per column
+plus the row count:
+
+    {
+        "format": "columnar",
+        "columnLabels": ["id", "ALB_source", "ALB_target"],
+        "columns": [[1, 2], [38.5, 41.0], [38.6, 41.0]],
+        "rowCount": 2,
+    }
+
+Each column list is read from the DataFrame in one vectorized pass, missing
+values becoming ``null``. Tables cut to ``max_rows`` rows also carry
+``"truncated": true`` and their full row count.
+"""
+
+
+def _column_values(series):
+    """JSON-ready values of a column (missing values as None)."""
+    if series.dtype.kind in "iub":
+        return series.tolist()
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+def table_payload(table, max_rows=None, total_rows=None, total_key="total_rows"):
+    """
+    Columnar table metric value of a DataFrame.
+
+    Args:
+        table: pandas DataFrame.
+        max_rows: rows kept in the payload (all when None).
+        total_rows: rows of the full table, when ``table`` already holds a
+            part of it (defaults to ``len(table)``).
+        total_key: key of the full row count of a truncated table.
+
+    Returns:
+        dict: the table metric value.
+    """
+    total = len(table) if total_rows is None else total_rows
+    if max_rows is not None and len(table) > max_rows:
+        table = table.head(max_rows)
+    payload = {
+        "format": "columnar",
+        "columnLabels": [str(column) for column in table.columns],
+        "columns": [_column_values(table.iloc[:, i]) for i in range(table.shape[1])],
+        "rowCount": len(table),
+    }
+    if total > len(table):
+        payload["truncated"] = True
+        payload[total_key] = total
+    return payload
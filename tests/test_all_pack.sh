@@ -50,6 +50,9 @@ for dataset in "${TEST_DATASETS[@]}"; do
             # 1. Copy source_conf.json from the dataset directory into the current test pack directory
             cp "${DATA_DIR}/${dataset}/source_conf.json" "${ROOT_DIR}/${pack}"
 
+            # Shared Python modules are imported by main.py as top-level modules
+            cp "${ROOT_DIR}/shared"/*.py "${ROOT_DIR}/${pack}/"
+
             # 2. Change to the test pack directory
             cd "${ROOT_DIR}/${pack}"
 
@@ -28,6 +28,9 @@ process_data_pack() {
         # 1. Copy source_conf.json from the dataset directory into the current test pack directory
         cp "${DATA_DIR}/${dataset}/source_conf.json" "${ROOT_DIR}/${pack}"
 
+        # Shared Python modules are imported by main.py as top-level modules
+        cp "${SHARED_DIR}"/*.py "${ROOT_DIR}/${pack}/"
+
         # 2. Change to the test pack directory
         cd "${ROOT_DIR}/${pack}" || return
 
@@ -74,6 +77,7 @@ fi
 PACK=$1
 ROOT_DIR=$(pwd)
 DATA_DIR="${ROOT_DIR}/data"
+SHARED_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)/shared"
 
 # Check if the second argument is provided (non-empty)
 if [ -n "$2" ]; then
@@ -14,6 +14,7 @@ Covers ks:
 import pandas as pd
 import numpy as np
 from qalita_core.pack import Pack
+from columnar_loader import load_parquet
 from qalita_core.utils import determine_recommendation_level
 
 # Common null placeholder patterns
@@ -126,23 +127,21 @@ with Pack() as pack:
     raw_df_source = pack.df_source
     configured = pack.source_config.get("config", {}).get("table_or_query")
 
-    def _load_parquet_if_path(obj):
-        try:
-            if isinstance(obj, str) and obj.lower().endswith((".parquet", ".pq")):
-                return pd.read_parquet(obj, engine="pyarrow")
-        except Exception:
-            pass
-        return obj
+    # Only the rule columns are read when text columns are not all analyzed
+    job_config = pack.pack_config.get("job", {})
+    load_columns = None
+    if not job_config.get("analyze_all_text_columns", True):
+        load_columns = [rule.get("column") for rule in job_config.get("rules", [])]
 
     if isinstance(raw_df_source, list):
-        loaded = [_load_parquet_if_path(x) for x in raw_df_source]
+        loaded = [load_parquet(x, columns=load_columns) for x in raw_df_source]
         if isinstance(configured, (list, tuple)) and len(configured) == len(loaded):
             items = list(zip(list(configured), loaded))
         else:
             base = pack.source_config["name"]
             items = [(f"{base}_{i+1}", df) for i, df in enumerate(loaded)]
     else:
-        items = [(pack.source_config["name"], _load_parquet_if_path(raw_df_source))]
+        items = [(pack.source_config["name"], load_parquet(raw_df_source, columns=load_columns))]
 
     # Get validation rules from config
     validation_rules = pack.pack_config.get("job", {}).get("rules", [])
@@ -5,6 +5,7 @@ from datetime import datetime
 import re
 import os
 from qalita_core.pack import Pack
+from columnar_loader import load_parquet
 from qalita_core.aggregation import detect_chunked_from_items, TimelinessAggregator, normalize_and_dedupe_recommendations
 
 # --- Chargement des données ---
@@ -82,17 +83,9 @@ with Pack() as pack:
             except Exception:
                 return pd.to_datetime(series, errors="coerce")
 
-    def _load_parquet_if_path(obj):
-        try:
-            if isinstance(obj, str) and obj.lower().endswith((".parquet", ".pq")):
-                return pd.read_parquet(obj, engine="pyarrow")
-        except Exception:
-            pass
-        return obj
-
     if isinstance(raw_df_source, list):
         names = pack.source_config.get("config", {}).get("table_or_query")
-        loaded = [_load_parquet_if_path(x) for x in raw_df_source]
+        loaded = [load_parquet(x) for x in raw_df_source]
         if isinstance(names, (list, tuple)) and len(names) == len(loaded):
             dataset_items = list(zip(list(names), loaded))
             names_for_detect = [str(n) for n in names]
@@ -101,7 +94,7 @@ with Pack() as pack:
             dataset_items = [(f"{base}_{i+1}", df) for i, df in enumerate(loaded)]
             names_for_detect = [name for name, _ in dataset_items]
     else:
-        dataset_items = [(pack.source_config["name"], _load_parquet_if_path(raw_df_source))]
+        dataset_items = [(pack.source_config["name"], load_parquet(raw_df_source))]
         names_for_detect = None
 
     raw_items_list = raw_df_source if isinstance(raw_df_source, list) else [raw_df_source]